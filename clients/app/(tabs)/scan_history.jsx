@@ -19,6 +19,8 @@ const ScanHistoryScreen = () => {
   const [scans, setScans] = useState([]);
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filterType, setFilterType] = useState('all'); // 'all', 'high', 'medium', 'low', 'safe'
   const [fadeAnim] = useState(new Animated.Value(0));
   const navigation = useNavigation();
@@ -36,23 +38,28 @@ const ScanHistoryScreen = () => {
     }).start();
   }, []);
 
-  const fetchScanHistory = async () => {
+  const fetchScanHistory = async (cursor = null) => {
     try {
-      const res = await api.get('/your_scan_history/');
-      // Sort scans by created_at in descending order (newest first)
-      const sortedScans = [...res.data].sort((a, b) => 
-        new Date(b.created_at) - new Date(a.created_at)
-      );
-      setScans(sortedScans);
+      // Pages come newest first; next_cursor is null on the last page
+      const res = await api.get('/your_scan_history/', { params: cursor ? { cursor } : {} });
+      setScans(prev => (cursor ? [...prev, ...res.data.results] : res.data.results));
+      setNextCursor(res.data.next_cursor);
     } catch (err) {
       console.error('Error fetching scan history:', err);
       Alert.alert('Error', 'Failed to load scan history');
     } finally {
       setLoading(false);
       setRefreshing(false);
+      setLoadingMore(false);
     }
   };
 
+  const loadMore = () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    fetchScanHistory(nextCursor);
+  };
+
   const onRefresh = () => {
     setRefreshing(true);
     fetchScanHistory();
@@ -301,6 +308,9 @@ const ScanHistoryScreen = () => {
         renderItem={renderScanItem}
         keyExtractor={(item) => item.id.toString()}
         contentContainerStyle={styles.listContent}
+        onEndReached={loadMore}
+        onEndReachedThreshold={0.5}
+        ListFooterComponent={loadingMore ? <ActivityIndicator color="#a855f7" style={{ marginVertical: 16 }} /> : null}
         refreshControl={
           <RefreshControl
             refreshing={refreshing}
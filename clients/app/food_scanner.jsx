@@ -19,6 +19,10 @@ import api from '@/assets/api';
 
 const { width } = Dimensions.get('window');
 
+// Give a background scan about two minutes before giving up on it
+const POLL_INTERVAL_MS = 1000;
+const MAX_POLLS = 120;
+
 const ScanFoodScreen = () => {
   // Tab state
   const [activeTab, setActiveTab] = useState('image'); // 'image' or 'text'
@@ -117,13 +121,26 @@ const ScanFoodScreen = () => {
           "Content-Type": "multipart/form-data",
         },
       });
+
+      // The scan is classified in the background; poll until it finishes
+      let scan = response.data;
+      for (let polls = 0; scan.status === 'pending' || scan.status === 'processing'; polls++) {
+        if (polls >= MAX_POLLS) {
+          throw new Error('Scan is taking too long');
+        }
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+        scan = (await api.get(`/scan-food/${scan.id}/`)).data;
+      }
+      if (scan.status === 'failed') {
+        throw new Error(scan.error || 'Scan failed');
+      }
       
-      setResult(response.data);
+      setResult(scan);
       
       // Success feedback
       Alert.alert(
         "Analysis Complete! ✅", 
-        `Food analyzed successfully. ${response.data.risk_level === 'high' ? '⚠️ High risk detected!' : 'Results are ready to view.'}`
+        `Food analyzed successfully. ${scan.risk_level === 'high' ? '⚠️ High risk detected!' : 'Results are ready to view.'}`
       );
     } catch (error) {
       console.error(error);
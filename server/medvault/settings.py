@@ -261,3 +261,96 @@ load_dotenv()  # Load environment variables from .env file
 TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
 TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
 TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
+
+
+# Emergency pages are cached per QR token. Local memory is per process, so set
+# EMERGENCY_CACHE_URL (e.g. redis://localhost:6379/1) to share the cache and its
+# invalidations between gunicorn workers. Without it, pages are only cached for
+# EMERGENCY_PAGE_LOCAL_CACHE_TIMEOUT seconds, since a deactivation in one worker
+# cannot clear the copies held by the others.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'emergency': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('EMERGENCY_CACHE_URL'),
+    } if os.getenv('EMERGENCY_CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'emergency-pages',
+    },
+}
+EMERGENCY_PAGE_CACHE = 'emergency'
+EMERGENCY_PAGE_CACHE_TIMEOUT = int(os.getenv('EMERGENCY_PAGE_CACHE_TIMEOUT', 300))
+EMERGENCY_PAGE_LOCAL_CACHE_TIMEOUT = int(os.getenv('EMERGENCY_PAGE_LOCAL_CACHE_TIMEOUT', 5))
+
+# collect_orphaned_media leaves files younger than this alone. Images the app
+# uploads to Cloudinary itself carry CLOUDINARY_MEDIA_TAG, which is what the
+# opt-in CloudinaryField sweep lists.
+MEDIA_GC_MIN_AGE_MINUTES = int(os.getenv('MEDIA_GC_MIN_AGE_MINUTES', 60))
+CLOUDINARY_MEDIA_TAG = os.getenv('CLOUDINARY_MEDIA_TAG', 'medvault')
+
+# Base64url Ed25519 seed for offline emergency cards. Falls back to a key
+# derived from SECRET_KEY when unset.
+OFFLINE_CARD_SIGNING_KEY = os.getenv('OFFLINE_CARD_SIGNING_KEY')
+
+# Background threads per process that upload and classify food scans
+FOOD_SCAN_WORKERS = int(os.getenv('FOOD_SCAN_WORKERS', 4))
+FOOD_SCAN_BATCH_WORKERS = int(os.getenv('FOOD_SCAN_BATCH_WORKERS', 8))
+# sweep_stale_scans finishes scans still unfinished after this many minutes,
+# e.g. because the process holding them restarted
+FOOD_SCAN_STALE_MINUTES = int(os.getenv('FOOD_SCAN_STALE_MINUTES', 10))
+
+# Food photos are downscaled and re-encoded before upload and classification.
+# Photos within FOOD_IMAGE_DUPLICATE_DISTANCE bits (dHash) of one of the user's
+# last FOOD_IMAGE_DUPLICATE_LOOKBACK scans reuse that scan's result.
+FOOD_IMAGE_MAX_SIDE = int(os.getenv('FOOD_IMAGE_MAX_SIDE', 512))
+FOOD_IMAGE_QUALITY = int(os.getenv('FOOD_IMAGE_QUALITY', 80))
+FOOD_IMAGE_DUPLICATE_DISTANCE = int(os.getenv('FOOD_IMAGE_DUPLICATE_DISTANCE', 6))
+FOOD_IMAGE_DUPLICATE_LOOKBACK = int(os.getenv('FOOD_IMAGE_DUPLICATE_LOOKBACK', 200))
+
+# Required for scans Nyckel classifies; set them in the environment or .env
+NYCKEL_CLIENT_ID = os.getenv('NYCKEL_CLIENT_ID')
+NYCKEL_CLIENT_SECRET = os.getenv('NYCKEL_CLIENT_SECRET')
+NYCKEL_SERVER_URL = os.getenv('NYCKEL_SERVER_URL', 'https://www.nyckel.com')
+NYCKEL_CONNECT_TIMEOUT = float(os.getenv('NYCKEL_CONNECT_TIMEOUT', 3.05))
+NYCKEL_READ_TIMEOUT = float(os.getenv('NYCKEL_READ_TIMEOUT', 15))
+
+# Local allergen matches at or above this confidence skip Nyckel
+LOCAL_ALLERGEN_MIN_CONFIDENCE = float(os.getenv('LOCAL_ALLERGEN_MIN_CONFIDENCE', 0.8))
+
+# In-process cache of Nyckel results, keyed by food name and image hash
+CLASSIFIER_CACHE_SIZE = int(os.getenv('CLASSIFIER_CACHE_SIZE', 2048))
+CLASSIFIER_CACHE_TTL = int(os.getenv('CLASSIFIER_CACHE_TTL', 24 * 3600))
+
+# Days of daily scan counts kept on each ScanSummary for the dashboard trend
+SCAN_SUMMARY_TREND_DAYS = int(os.getenv('SCAN_SUMMARY_TREND_DAYS', 90))
+
+# Threads per process that credit deposits from Paystack webhooks. Point the
+# Paystack dashboard webhook URL at /paystack/webhook/.
+PAYSTACK_WEBHOOK_WORKERS = int(os.getenv('PAYSTACK_WEBHOOK_WORKERS', 2))
+
+# Outbound Paystack calls. Only idempotent calls (verify) are retried.
+PAYSTACK_BASE_URL = os.getenv('PAYSTACK_BASE_URL', 'https://api.paystack.co')
+PAYSTACK_CONNECT_TIMEOUT = float(os.getenv('PAYSTACK_CONNECT_TIMEOUT', 3.05))
+PAYSTACK_READ_TIMEOUT = float(os.getenv('PAYSTACK_READ_TIMEOUT', 10))
+PAYSTACK_MAX_RETRIES = int(os.getenv('PAYSTACK_MAX_RETRIES', 2))
+
+# reconcile_deposits: deposits pending for DEPOSIT_RECONCILE_MIN_AGE_MINUTES are
+# checked with Paystack; unpaid ones are failed after DEPOSIT_PENDING_TTL_HOURS.
+DEPOSIT_RECONCILE_MIN_AGE_MINUTES = int(os.getenv('DEPOSIT_RECONCILE_MIN_AGE_MINUTES', 15))
+DEPOSIT_PENDING_TTL_HOURS = int(os.getenv('DEPOSIT_PENDING_TTL_HOURS', 24))
+DEPOSIT_RECONCILE_WORKERS = int(os.getenv('DEPOSIT_RECONCILE_WORKERS', 8))
+
+# Wallet statements: rows fetched per cursor round trip, how large a finished
+# PDF may be before it is spooled to disk, and the most rows a PDF may hold
+# (reportlab keeps every page in memory until the PDF is saved)
+STATEMENT_CHUNK_SIZE = int(os.getenv('STATEMENT_CHUNK_SIZE', 500))
+STATEMENT_PDF_SPOOL_SIZE = int(os.getenv('STATEMENT_PDF_SPOOL_SIZE', 5 * 1024 * 1024))
+STATEMENT_PDF_MAX_ROWS = int(os.getenv('STATEMENT_PDF_MAX_ROWS', 5000))
+
+# Wallet limits (see medvaultapp/limits.py). Amount limits are off when unset.
+WALLET_DEPOSIT_INTERVAL_DAYS = int(os.getenv('WALLET_DEPOSIT_INTERVAL_DAYS', 7))
+WALLET_MAX_DEPOSIT = os.getenv('WALLET_MAX_DEPOSIT')
+WALLET_MAX_WITHDRAWAL = os.getenv('WALLET_MAX_WITHDRAWAL')
+WALLET_DAILY_WITHDRAWAL_LIMIT = os.getenv('WALLET_DAILY_WITHDRAWAL_LIMIT')
@@ -5,8 +5,11 @@ from .models import *
 
 admin.site.register(CustomUser)
 admin.site.register(EmergencyProfile)
+admin.site.register(Allergy)
 admin.site.register(QRCode)  
 admin.site.register(FoodAllergyScan)   
+admin.site.register(ScanSummary)
 admin.site.register(Wallet)
 admin.site.register(Transaction)
+admin.site.register(LedgerEntry)
 admin.site.register(Hospital)
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""Allergen families and cross-reactive groups for scan matching.
+
+The taxonomy below is expanded once at import into a transitive closure.
+Every term gets an integer id, and ``RELATED[id]`` is a bitset of its
+ancestors, its descendants and its cross-reactive peers. Whether a
+detected allergen hits any of a user's allergies is then a single AND of
+two ints.
+"""
+from functools import lru_cache
+
+from .allergies import normalize_allergen
+
+
+# term -> families it belongs to (is-a). Families can have families.
+PARENTS = {
+    "peanut": ["legume", "nut"],
+    "soy": ["legume"],
+    "lentil": ["legume"],
+    "chickpea": ["legume"],
+    "pea": ["legume"],
+    "bean": ["legume"],
+    "lupin": ["legume"],
+    "tree nut": ["nut"],
+    "almond": ["tree nut"],
+    "cashew": ["tree nut"],
+    "walnut": ["tree nut"],
+    "pecan": ["tree nut"],
+    "hazelnut": ["tree nut"],
+    "pistachio": ["tree nut"],
+    "brazil nut": ["tree nut"],
+    "macadamia": ["tree nut"],
+    "crustacean": ["shellfish"],
+    "mollusc": ["shellfish"],
+    "shrimp": ["crustacean"],
+    "prawn": ["crustacean"],
+    "crab": ["crustacean"],
+    "lobster": ["crustacean"],
+    "crayfish": ["crustacean"],
+    "oyster": ["mollusc"],
+    "clam": ["mollusc"],
+    "mussel": ["mollusc"],
+    "scallop": ["mollusc"],
+    "periwinkle": ["mollusc"],
+    "snail": ["mollusc"],
+    "squid": ["mollusc"],
+    "octopus": ["mollusc"],
+    "salmon": ["fish"],
+    "tuna": ["fish"],
+    "cod": ["fish"],
+    "sardine": ["fish"],
+    "mackerel": ["fish"],
+    "tilapia": ["fish"],
+    "catfish": ["fish"],
+    "stockfish": ["fish"],
+    "anchovy": ["fish"],
+    "cheese": ["milk"],
+    "butter": ["milk"],
+    "yogurt": ["milk"],
+    "cream": ["milk"],
+    "wheat": ["gluten"],
+    "barley": ["gluten"],
+    "rye": ["gluten"],
+}
+
+# Members of a group react to one another without one being a kind of the other
+CROSS_REACTIVE = [
+    ["peanut", "lupin"],
+    ["shrimp", "prawn", "crab", "lobster", "crayfish"],
+    ["cashew", "pistachio"],
+    ["walnut", "pecan"],
+    ["salmon", "tuna", "cod", "sardine", "mackerel", "tilapia", "catfish", "stockfish", "anchovy"],
+]
+
+# Other names for the same allergen
+ALIASES = {
+    "dairy": "milk",
+    "lactose": "milk",
+    "yoghurt": "yogurt",
+    "groundnut": "peanut",
+    "soya": "soy",
+    "soybean": "soy",
+    "mollusk": "mollusc",
+    "seafood": "shellfish",
+    "nuts": "nut",
+}
+
+
+def _build():
+    terms = set(PARENTS) | {p for parents in PARENTS.values() for p in parents}
+    terms |= {t for group in CROSS_REACTIVE for t in group}
+    ids = {}
+    for term in sorted(terms):
+        ids.setdefault(normalize_allergen(term), len(ids))
+
+    def bit(term):
+        return 1 << ids[normalize_allergen(term)]
+
+    ancestors = {}
+
+    def closure(term):
+        if term not in ancestors:
+            mask = bit(term)
+            for parent in PARENTS.get(term, []):
+                mask |= closure(parent)
+            ancestors[term] = mask
+        return ancestors[term]
+
+    related = [0] * len(ids)
+    for term in terms:
+        mask = closure(term)
+        related[ids[normalize_allergen(term)]] |= mask
+        # ...and every ancestor of `term` is related back to it
+        for i in range(len(ids)):
+            if mask >> i & 1:
+                related[i] |= bit(term)
+    for group in CROSS_REACTIVE:
+        group_mask = 0
+        for term in group:
+            group_mask |= bit(term)
+        for term in group:
+            related[ids[normalize_allergen(term)]] |= group_mask
+
+    for alias, term in ALIASES.items():
+        ids[normalize_allergen(alias)] = ids[normalize_allergen(term)]
+    return ids, tuple(related)
+
+
+TERM_IDS, RELATED = _build()
+
+
+def term_id(name):
+    return TERM_IDS.get(normalize_allergen(name))
+
+
+@lru_cache(maxsize=8192)
+def allergies_mask(allergies):
+    """Bitset of the known terms in a frozenset of normalized allergies."""
+    mask = 0
+    for name in allergies:
+        i = TERM_IDS.get(name)
+        if i is not None:
+            mask |= 1 << i
+    return mask
+
+
+def allergen_matches(allergen, allergies):
+    """True if `allergen` is, contains, belongs to or cross-reacts with one of `allergies`.
+
+    `allergen` and `allergies` must already be normalized (see normalize_allergen).
+    """
+    if allergen in allergies:
+        return True
+    i = TERM_IDS.get(allergen)
+    if i is None:
+        return False
+    return bool(RELATED[i] & allergies_mask(allergies))
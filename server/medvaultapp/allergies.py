@@ -0,0 +1,44 @@
+from functools import lru_cache
+
+import inflect
+
+
+p = inflect.engine()  # For plural/singular conversion
+
+# Allergy.name max_length; longer entries are cut to fit the index
+MAX_ALLERGY_LENGTH = 100
+
+
+@lru_cache(maxsize=4096)
+def normalize_allergen(name):
+    name = " ".join(name.strip().lower().split())
+    return p.singular_noun(name) or name
+
+
+def parse_allergies(text):
+    """Split a comma separated allergy list into a set of singular, lowercase names."""
+    return frozenset(
+        normalize_allergen(a)[:MAX_ALLERGY_LENGTH].rstrip() for a in (text or "").split(",") if a.strip()
+    )
+
+
+def sync_allergy_index(profile):
+    """Bring the Allergy rows for `profile` in line with its allergies text."""
+    from .models import Allergy
+
+    wanted = parse_allergies(profile.allergies)
+    existing = set(Allergy.objects.filter(profile=profile).values_list('name', flat=True))
+    if existing - wanted:
+        Allergy.objects.filter(profile=profile, name__in=existing - wanted).delete()
+    if wanted - existing:
+        Allergy.objects.bulk_create(
+            [Allergy(profile=profile, name=name) for name in wanted - existing],
+            ignore_conflicts=True,
+        )
+    return wanted
+
+
+def allergy_set(user_id):
+    from .models import Allergy
+
+    return frozenset(Allergy.objects.filter(profile__user_id=user_id).values_list('name', flat=True))
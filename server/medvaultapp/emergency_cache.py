@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+
+from .models import QR_ACTIVE_FOR
+
+
+def _cache():
+    return caches[getattr(settings, 'EMERGENCY_PAGE_CACHE', 'emergency')]
+
+
+def _timeout():
+    # A per-process cache cannot see deactivations made in other workers, so
+    # only hold pages there long enough to absorb a burst of repeat scans
+    if isinstance(_cache(), LocMemCache):
+        return getattr(settings, 'EMERGENCY_PAGE_LOCAL_CACHE_TIMEOUT', 5)
+    return getattr(settings, 'EMERGENCY_PAGE_CACHE_TIMEOUT', 300)
+
+
+def page_key(token):
+    return f"emergency-page:{token}"
+
+
+def get_cached_page(token, activated_ts=None):
+    """Return the cached emergency page for `token`, or None.
+
+    When `activated_ts` is given the page must belong to that activation, so
+    links issued for an earlier activation never see a newer page.
+    """
+    entry = _cache().get(page_key(token))
+    if entry is None:
+        return None
+    cached_ts, content = entry
+    if activated_ts is not None and cached_ts != activated_ts:
+        return None
+    return content
+
+
+def cache_page(qrcode, content):
+    # Never outlive the activation window
+    remaining = (qrcode.activated_at + QR_ACTIVE_FOR - timezone.now()).total_seconds()
+    timeout = min(int(remaining), _timeout())
+    if timeout > 0:
+        entry = (int(qrcode.activated_at.timestamp()), content)
+        _cache().set(page_key(qrcode.qr_token), entry, timeout)
+
+
+def invalidate_page(token):
+    _cache().delete(page_key(token))
@@ -0,0 +1,56 @@
+import os
+from dataclasses import dataclass
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+
+@dataclass
+class PreparedImage:
+    name: str
+    data: bytes
+    content_type: str
+    phash: str
+
+    def as_upload(self):
+        return self.name, self.data, self.content_type
+
+
+def dhash(image, size=8):
+    """64-bit difference hash as 16 hex chars; near-identical photos differ in few bits."""
+    small = image.convert('L').resize((size + 1, size), Image.LANCZOS)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:016x}"
+
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def prepare_image(name, data):
+    """Orient, downscale and re-encode a food photo, and hash it.
+
+    The classifier gains nothing from full camera resolution, so images are
+    capped at FOOD_IMAGE_MAX_SIDE pixels and stored as JPEG.
+    """
+    max_side = getattr(settings, 'FOOD_IMAGE_MAX_SIDE', 512)
+    quality = getattr(settings, 'FOOD_IMAGE_QUALITY', 80)
+
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        phash = dhash(image)
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', quality=quality, optimize=True)
+
+    stem = os.path.splitext(os.path.basename(name or 'food'))[0] or 'food'
+    return PreparedImage(f"{stem}.jpg", buffer.getvalue(), 'image/jpeg', phash)
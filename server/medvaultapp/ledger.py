@@ -0,0 +1,94 @@
+"""Wallet balance changes.
+
+Every change goes through here. The balance, and the limit counters on the
+wallet row, are moved by a single UPDATE with F() expressions (conditional
+on funds and the daily cap for debits), and a LedgerEntry is appended in
+the same database transaction. The UPDATE holds the wallet row lock until
+commit, so concurrent withdrawals and duplicate payment callbacks can
+neither lose an update nor overdraw the wallet.
+"""
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .limits import LimitExceeded, daily_withdrawal_limit, within_daily_limit
+from .models import LedgerEntry, Transaction, Wallet
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+def _append(wallet_id, entry_type, amount, txn=None):
+    # Our UPDATE already holds the row lock, so this read sees exactly our result
+    balance = Wallet.objects.values_list('user_balance', flat=True).get(pk=wallet_id)
+    return LedgerEntry.objects.create(
+        wallet_id=wallet_id, transaction=txn, entry_type=entry_type, amount=amount, balance_after=balance,
+    )
+
+
+def withdraw(wallet, amount, description=None):
+    """Debit `wallet` and record a pending payout. Returns (transaction, ledger entry).
+
+    Raises InsufficientFunds, or LimitExceeded when the daily withdrawal cap would be passed.
+    Raises ValueError unless `amount` is positive.
+    """
+    if amount <= 0:
+        raise ValueError("Withdrawal amount must be positive.")
+    today = timezone.localdate()
+    amount_value = Value(amount, output_field=DecimalField(max_digits=12, decimal_places=2))
+    with transaction.atomic():
+        debited = Wallet.objects.filter(within_daily_limit(amount, today), pk=wallet.pk, user_balance__gte=amount).update(
+            user_balance=F('user_balance') - amount,
+            # The daily counter restarts on the first withdrawal of a new day
+            withdrawn_today=Case(When(withdrawn_on=today, then=F('withdrawn_today') + amount_value), default=amount_value),
+            withdrawn_on=today,
+        )
+        if not debited:
+            balance = Wallet.objects.values_list('user_balance', flat=True).get(pk=wallet.pk)
+            if balance < amount:
+                raise InsufficientFunds()
+            raise LimitExceeded(f"This would exceed your daily withdrawal limit of {daily_withdrawal_limit()}.")
+        txn = Transaction.objects.create(
+            wallet=wallet, amount=amount, transaction_type='debit', status='pending', description=description,
+        )
+        entry = _append(wallet.pk, 'debit', -amount, txn)
+    wallet.user_balance = entry.balance_after
+    return txn, entry
+
+
+def flag_for_review(deposit):
+    """Hold a pending deposit whose paid amount disagrees with it. Returns True if it was still pending."""
+    return bool(Transaction.objects.filter(pk=deposit.pk, status='pending').update(status='review'))
+
+
+def settle_deposit(reference, amount=None):
+    """Mark the pending deposit `reference` successful and credit its wallet.
+
+    Returns (transaction, ledger entry), with entry None when the deposit
+    had already been settled or its amount is not `amount`. Raises
+    Transaction.DoesNotExist for unknown references and ValueError for
+    non-positive amounts.
+    """
+    if amount is not None and amount <= 0:
+        raise ValueError("Deposit amount must be positive.")
+    pending = Transaction.objects.filter(payment_reference=reference, transaction_type='credit', status='pending')
+    if amount is not None:
+        pending = pending.filter(amount=amount)
+    with transaction.atomic():
+        # Only one caller can move the row out of pending
+        claimed = pending.update(status='success')
+        txn = Transaction.objects.get(payment_reference=reference, transaction_type='credit')
+        if not claimed:
+            return txn, None
+        if txn.amount <= 0:
+            # Rolls the claim back along with the transaction
+            raise ValueError("Deposit amount must be positive.")
+        Wallet.objects.filter(pk=txn.wallet_id).update(
+            user_balance=F('user_balance') + txn.amount,
+            # A late-settling older deposit must not move this backwards
+            last_deposit_at=Greatest(Coalesce(F('last_deposit_at'), Value(txn.created_at)), Value(txn.created_at)),
+        )
+        entry = _append(txn.wallet_id, 'credit', txn.amount, txn)
+    return txn, entry
@@ -0,0 +1,72 @@
+"""Per-wallet deposit and withdrawal limits.
+
+Every check reads counters kept on the Wallet row itself (last_deposit_at,
+withdrawn_today/withdrawn_on), which ledger.py updates in the same UPDATE
+that moves the balance. A check is therefore a read of a row the caller
+already has, never a scan of the transaction history. The daily withdrawal
+cap is only enforced by the withdrawal's conditional UPDATE, so concurrent
+withdrawals cannot exceed it between check and debit.
+
+Unset amount limits are not enforced.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+
+class LimitExceeded(Exception):
+    pass
+
+
+def _amount_setting(name):
+    value = getattr(settings, name, None)
+    return Decimal(str(value)) if value not in (None, '') else None
+
+
+def deposit_interval():
+    return timedelta(days=getattr(settings, 'WALLET_DEPOSIT_INTERVAL_DAYS', 7))
+
+
+def max_deposit():
+    return _amount_setting('WALLET_MAX_DEPOSIT')
+
+
+def max_withdrawal():
+    return _amount_setting('WALLET_MAX_WITHDRAWAL')
+
+
+def daily_withdrawal_limit():
+    return _amount_setting('WALLET_DAILY_WITHDRAWAL_LIMIT')
+
+
+def within_daily_limit(amount, today):
+    """Filter for wallets that can withdraw `amount` more today (for the conditional UPDATE)."""
+    limit = daily_withdrawal_limit()
+    if limit is None:
+        return Q()
+    if amount > limit:
+        return Q(pk__in=[])
+    return ~Q(withdrawn_on=today) | Q(withdrawn_today__lte=limit - amount)
+
+
+def check_deposit(wallet, amount, now=None):
+    ceiling = max_deposit()
+    if ceiling is not None and amount > ceiling:
+        raise LimitExceeded(f"You can deposit at most {ceiling} at a time.")
+    now = now or timezone.now()
+    if wallet.last_deposit_at and wallet.last_deposit_at > now - deposit_interval():
+        days = deposit_interval().days
+        period = {1: "a day", 7: "a week"}.get(days, f"every {days} days")
+        raise LimitExceeded(f"You can only deposit once {period}. Please try again later.")
+
+
+def check_withdrawal(wallet, amount):
+    """Per-withdrawal ceiling. The daily cap is checked by ledger.withdraw's UPDATE."""
+    if amount <= 0:
+        raise ValueError("Withdrawal amount must be positive.")
+    ceiling = max_withdrawal()
+    if ceiling is not None and amount > ceiling:
+        raise LimitExceeded(f"You can withdraw at most {ceiling} at a time.")
@@ -0,0 +1,168 @@
+"""In-process allergen lookup for common foods.
+
+Answers well-known dishes and ingredients without a network call. The scan
+pipeline only escalates to Nyckel when this returns nothing or a low
+confidence, and falls back to it when Nyckel is unreachable.
+"""
+import re
+from functools import lru_cache
+
+import inflect
+
+
+p = inflect.engine()
+
+# Whole dishes and every allergen their usual recipe contains. Only dishes
+# whose allergens can be listed in full belong here: a partial list would
+# clear a user who is allergic to one of the missing ones.
+DISH_ALLERGENS = {
+    "suya": {"peanut"},
+    "kuli kuli": {"peanut"},
+    "peanut butter": {"peanut"},
+    "groundnut": {"peanut"},
+    "akara": {"legume"},
+    "ewa agoyin": {"legume"},
+    "chin chin": {"wheat", "milk", "egg"},
+    "puff puff": {"wheat"},
+    "meat pie": {"wheat", "milk", "egg"},
+    "buns": {"wheat", "milk", "egg"},
+    "pasta": {"wheat"},
+    "spaghetti": {"wheat"},
+    "pancake": {"wheat", "milk", "egg"},
+    "omelette": {"egg"},
+    "scrambled eggs": {"egg", "milk"},
+    "mayonnaise": {"egg"},
+    "ice cream": {"milk", "egg"},
+    "yoghurt": {"milk"},
+    "yogurt": {"milk"},
+    "cheese": {"milk"},
+    "wara": {"milk"},
+    "fura da nono": {"milk"},
+    "shrimp": {"shellfish"},
+    "prawn": {"shellfish"},
+    "crayfish": {"shellfish"},
+    "lobster": {"shellfish"},
+    "crab": {"shellfish"},
+    "tofu": {"soy"},
+    "soy milk": {"soy"},
+    "soybean": {"soy"},
+    "hummus": {"sesame", "legume"},
+    "tahini": {"sesame"},
+    "almond": {"tree nut"},
+    "cashew": {"tree nut"},
+    "walnut": {"tree nut"},
+    "pecan": {"tree nut"},
+    "hazelnut": {"tree nut"},
+    "pistachio": {"tree nut"},
+}
+
+# Dishes whose allergens depend on the cook (fish, crayfish, egg, toppings,
+# sauces). They are never answered locally, so Nyckel decides.
+VARIABLE_DISHES = {
+    "groundnut soup",
+    "peanut soup",
+    "pad thai",
+    "satay",
+    "moi moi",
+    "moin moin",
+    "beans porridge",
+    "bread",
+    "noodles",
+    "indomie",
+    "pizza",
+    "pepper soup",
+    "fish stew",
+    "sushi",
+    "seafood okra",
+}
+
+# Ingredients that identify an allergen wherever they appear in a name
+INGREDIENT_ALLERGENS = {
+    "peanut": "peanut",
+    "groundnut": "peanut",
+    "bean": "legume",
+    "lentil": "legume",
+    "chickpea": "legume",
+    "wheat": "wheat",
+    "flour": "wheat",
+    "bread": "wheat",
+    "egg": "egg",
+    "milk": "milk",
+    "cheese": "milk",
+    "butter": "milk",
+    "cream": "milk",
+    "fish": "fish",
+    "salmon": "fish",
+    "tuna": "fish",
+    "sardine": "fish",
+    "mackerel": "fish",
+    "stockfish": "fish",
+    "shrimp": "shellfish",
+    "prawn": "shellfish",
+    "crayfish": "shellfish",
+    "crab": "shellfish",
+    "lobster": "shellfish",
+    "periwinkle": "shellfish",
+    "oyster": "shellfish",
+    "soy": "soy",
+    "soya": "soy",
+    "sesame": "sesame",
+    "almond": "tree nut",
+    "cashew": "tree nut",
+    "walnut": "tree nut",
+    "hazelnut": "tree nut",
+}
+
+DISH_CONFIDENCE = 0.95
+INGREDIENT_CONFIDENCE = 0.85
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+
+@lru_cache(maxsize=4096)
+def _singular(token):
+    return p.singular_noun(token) or token
+
+
+def _tokens(text):
+    return tuple(_singular(t) for t in _TOKEN_RE.findall(text.lower()))
+
+
+# Built once at import: normalized dish phrase -> allergens (None when the
+# recipe varies), token -> allergens
+_DISH_INDEX = {_tokens(name): frozenset(allergens) for name, allergens in DISH_ALLERGENS.items()}
+_DISH_INDEX.update((_tokens(name), None) for name in VARIABLE_DISHES)
+_TOKEN_INDEX = {}
+for _name, _allergen in INGREDIENT_ALLERGENS.items():
+    _TOKEN_INDEX.setdefault(_singular(_name), set()).add(_allergen)
+
+
+def _result(allergens, confidence):
+    allergens = sorted(allergens)
+    return {"labelName": allergens[0], "allergens": allergens, "confidence": confidence, "source": "local"}
+
+
+def classify_food(food_name):
+    """Return a Nyckel-shaped result for `food_name`, or None if it is not known locally.
+
+    Local results also carry "allergens", every allergen in the food; the
+    labelName is one of them.
+    """
+    tokens = _tokens(food_name)
+    if not tokens:
+        return None
+
+    if tokens in _DISH_INDEX:
+        allergens = _DISH_INDEX[tokens]
+        return _result(allergens, DISH_CONFIDENCE) if allergens else None
+
+    found = set()
+    for token in tokens:
+        found |= _TOKEN_INDEX.get(token, set())
+    if not found:
+        return None
+    if all(token in _TOKEN_INDEX for token in tokens):
+        # Nothing but known ingredients, e.g. "egg" or "peanuts"
+        return _result(found, INGREDIENT_CONFIDENCE)
+    # Other words may hide other allergens: only good enough when Nyckel is down
+    return _result(found, INGREDIENT_CONFIDENCE / 2)
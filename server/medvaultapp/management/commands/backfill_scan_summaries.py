@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from medvaultapp.models import FoodAllergyScan
+from medvaultapp.scan_summary import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-user scan summaries from existing scans, a chunk of users at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users-per-chunk', type=int, default=200, help="Users rebuilt per transaction.")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Scan rows fetched per query.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        users = scans = 0
+        last_user_id = 0
+        while True:
+            # Keyset over user ids so each chunk is an index range scan
+            user_ids = list(
+                FoodAllergyScan.objects.filter(status="done", user_id__gt=last_user_id)
+                .order_by('user_id').values_list('user_id', flat=True).distinct()[:options['users_per_chunk']]
+            )
+            if not user_ids:
+                break
+            scans += rebuild_summaries(user_ids, chunk_size=options['chunk_size'])
+            users += len(user_ids)
+            last_user_id = user_ids[-1]
+            self.stdout.write(f"  {users} users, {scans} scans")
+
+        self.stdout.write(f"Rebuilt {users} summaries from {scans} scans in {time.monotonic() - started:.2f}s")
@@ -0,0 +1,85 @@
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from medvaultapp.nyckel_client import NyckelClient
+
+
+class StubNyckelHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the Nyckel token and invoke endpoints."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real service
+    # Headers and body go out in separate writes; without TCP_NODELAY each reused
+    # connection waits out Nagle plus delayed ACK (~40 ms) and swamps the timings
+    disable_nagle_algorithm = True
+    token_delay = 0.0
+    invoke_delay = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.path == '/connect/token':
+            time.sleep(self.token_delay)
+            body = {"access_token": "stub-token", "expires_in": 3600, "token_type": "Bearer"}
+        elif self.path.startswith('/v1/functions/'):
+            time.sleep(self.invoke_delay)
+            body = {"labelName": "peanuts", "labelId": "label_1", "confidence": 0.91}
+        else:
+            self.send_error(404)
+            return
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Compare per-scan Nyckel latency with a fresh client per scan vs the shared client, against a local stub."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scans', type=int, default=200)
+        parser.add_argument('--token-delay-ms', type=float, default=20.0, help="Simulated OAuth token exchange cost.")
+        parser.add_argument('--invoke-delay-ms', type=float, default=5.0, help="Simulated classification time.")
+
+    def handle(self, *args, **options):
+        StubNyckelHandler.token_delay = options['token_delay_ms'] / 1000
+        StubNyckelHandler.invoke_delay = options['invoke_delay_ms'] / 1000
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubNyckelHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        try:
+            # Before: what FoodAllergyScanView used to do, new credentials for every scan
+            before = self.run(lambda: NyckelClient('id', 'secret', server_url=url), options['scans'])
+            shared = NyckelClient('id', 'secret', server_url=url)
+            after = self.run(lambda: shared, options['scans'])
+        finally:
+            server.shutdown()
+
+        for label, samples in (("fresh client per scan", before), ("shared client", after)):
+            samples.sort()
+            self.stdout.write(
+                f"{label:>22}: mean {statistics.mean(samples):7.2f} ms  "
+                f"p50 {samples[len(samples) // 2]:7.2f} ms  "
+                f"p95 {samples[int(len(samples) * 0.95) - 1]:7.2f} ms"
+            )
+        self.stdout.write(f"speedup: {statistics.mean(before) / statistics.mean(after):.1f}x")
+
+    def run(self, make_client, scans):
+        samples = []
+        for _ in range(scans):
+            started = time.perf_counter()
+            client = make_client()
+            client.invoke("meals-identifier", "https://example.com/food.jpg")
+            client.invoke("food-allergens", "jollof rice")
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples
@@ -0,0 +1,100 @@
+import json
+import random
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand
+
+from medvaultapp.paystack_client import PaystackClient
+
+
+class FakePaystackHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the Paystack initialize and verify endpoints."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real service
+    # Headers and body go out in separate writes; without TCP_NODELAY each reused
+    # connection waits out Nagle plus delayed ACK (~40 ms) and swamps the timings
+    disable_nagle_algorithm = True
+    delay = 0.0
+    failure_rate = 0.0
+
+    def reply(self, code, body):
+        payload = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        time.sleep(self.delay)
+        if self.path != '/transaction/initialize':
+            return self.reply(404, {"status": False, "message": "Not found"})
+        self.reply(200, {"status": True, "data": {
+            "authorization_url": "https://checkout.paystack.com/fake", "reference": "fake",
+        }})
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        if not self.path.startswith('/transaction/verify/'):
+            return self.reply(404, {"status": False, "message": "Not found"})
+        if random.random() < self.failure_rate:
+            return self.reply(503, {"status": False, "message": "Service unavailable"})
+        self.reply(200, {"status": True, "data": {"status": "success", "amount": 50000}})
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare Paystack call latency with bare requests calls vs the shared PaystackClient, "
+        "against a local fake server. Plain HTTP, so the TLS handshakes pooling saves in production are not counted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=200)
+        parser.add_argument('--delay-ms', type=float, default=5.0, help="Simulated Paystack processing time.")
+        parser.add_argument('--failure-rate', type=float, default=0.0, help="Share of verify calls answered with 503.")
+
+    def handle(self, *args, **options):
+        FakePaystackHandler.delay = options['delay_ms'] / 1000
+        FakePaystackHandler.failure_rate = options['failure_rate']
+        server = ThreadingHTTPServer(('127.0.0.1', 0), FakePaystackHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        client = PaystackClient('sk_test_fake', base_url=url, backoff=0.01)
+        try:
+            # Before: what the views used to do, a new connection and no timeout per call
+            before = self.run(lambda ref: requests.get(f"{url}/transaction/verify/{ref}").json(), options['calls'])
+            after = self.run(client.verify, options['calls'])
+            for _ in range(options['calls'] // 10 or 1):
+                client.initialize("bench@example.com", 50000, "fake")
+        finally:
+            server.shutdown()
+
+        for label, (samples, failed) in (("bare requests", before), ("PaystackClient", after)):
+            samples.sort()
+            self.stdout.write(
+                f"{label:>15}: mean {statistics.mean(samples):7.2f} ms  "
+                f"p50 {samples[len(samples) // 2]:7.2f} ms  "
+                f"p95 {samples[int(len(samples) * 0.95) - 1]:7.2f} ms  "
+                f"failed {failed}"
+            )
+        self.stdout.write(f"speedup: {statistics.mean(before[0]) / statistics.mean(after[0]):.1f}x")
+        self.stdout.write(f"client metrics: {json.dumps(client.metrics.stats(), indent=2)}")
+
+    def run(self, verify, calls):
+        samples, failed = [], 0
+        for i in range(calls):
+            started = time.perf_counter()
+            body = verify(f"BENCH_{i}")
+            samples.append((time.perf_counter() - started) * 1000)
+            failed += not body.get('status')
+        return samples, failed
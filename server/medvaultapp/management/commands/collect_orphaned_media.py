@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from medvaultapp.media_gc import collect_orphaned_media
+
+
+class Command(BaseCommand):
+    help = "Delete stored media files that no model row references any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only count orphans, delete nothing.")
+        parser.add_argument('--page-size', type=int, default=500, help="Storage listing page size.")
+        parser.add_argument('--batch-size', type=int, default=100, help="Orphans deleted per batch.")
+        parser.add_argument(
+            '--min-age-minutes', type=int,
+            help="Leave files newer than this alone (default MEDIA_GC_MIN_AGE_MINUTES).",
+        )
+        parser.add_argument(
+            '--include-cloudinary-fields', action='store_true',
+            help="Also sweep CloudinaryField uploads carrying CLOUDINARY_MEDIA_TAG.",
+        )
+
+    def handle(self, *args, **options):
+        stats = collect_orphaned_media(
+            page_size=options['page_size'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            include_cloudinary_fields=options['include_cloudinary_fields'],
+            min_age=timedelta(minutes=options['min_age_minutes']) if options['min_age_minutes'] is not None else None,
+        )
+        action = "would delete" if options['dry_run'] else "deleted"
+        self.stdout.write(
+            f"Scanned {stats.scanned} files, found {stats.orphans} orphans, {action} "
+            f"{stats.orphans if options['dry_run'] else stats.deleted}, skipped {stats.too_recent} recent files "
+            f"in {stats.elapsed:.2f}s ({stats.rate:.0f} files/s)"
+        )
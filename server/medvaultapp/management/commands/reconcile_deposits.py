@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from medvaultapp.reconciliation import reconcile_pending_deposits
+
+
+class Command(BaseCommand):
+    help = "Verify pending deposits with Paystack, credit the paid ones and fail the ones past their TTL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age-minutes', type=int, default=None, help="Skip deposits younger than this.")
+        parser.add_argument('--ttl-hours', type=int, default=None, help="Fail unpaid deposits older than this.")
+        parser.add_argument('--chunk-size', type=int, default=200, help="Deposits read per query.")
+        parser.add_argument('--workers', type=int, default=None, help="Concurrent Paystack verify calls.")
+        parser.add_argument('--dry-run', action='store_true', help="Verify only, change nothing.")
+
+    def handle(self, *args, **options):
+        stats = reconcile_pending_deposits(
+            min_age=timedelta(minutes=options['min_age_minutes']) if options['min_age_minutes'] is not None else None,
+            ttl=timedelta(hours=options['ttl_hours']) if options['ttl_hours'] is not None else None,
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+        )
+        action = "would credit" if options['dry_run'] else "credited"
+        self.stdout.write(
+            f"Checked {stats.checked} pending deposits in {stats.elapsed:.2f}s: {action} {stats.credited}, "
+            f"{'would expire' if options['dry_run'] else 'expired'} {stats.expired}, "
+            f"{stats.still_pending} still pending, {stats.mismatched} amount mismatches, {stats.errors} errors"
+        )
@@ -0,0 +1,106 @@
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.db.models import Sum
+
+from medvaultapp import ledger
+from medvaultapp.models import LedgerEntry, Transaction, Wallet
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one throwaway wallet with concurrent withdrawals and duplicate deposit callbacks, "
+        "then check the final balance against the successful operations and the ledger."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--ops', type=int, default=50, help="Operations per thread.")
+        parser.add_argument('--opening-balance', type=Decimal, default=Decimal('1000.00'))
+        parser.add_argument('--amount', type=Decimal, default=Decimal('7.00'))
+        parser.add_argument('--keep', action='store_true', help="Keep the test user and wallet afterwards.")
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:12]
+        user = get_user_model().objects.create_user(username=f"stress-{tag}", password=uuid.uuid4().hex)
+        wallet = Wallet.objects.create(user=user, wallet_name=f"stress-{tag}", pin=1234)
+        amount = options['amount']
+
+        # Deposits are created up front; every one is settled by two threads at once
+        references = [f"STRESS_{tag}_{i}" for i in range((options['threads'] + 1) // 2 * options['ops'])]
+        Transaction.objects.bulk_create([
+            Transaction(wallet=wallet, amount=amount, payment_reference=ref, transaction_type='credit', status='pending')
+            for ref in references
+        ])
+        if options['opening_balance']:
+            Wallet.objects.filter(pk=wallet.pk).update(user_balance=options['opening_balance'])
+            LedgerEntry.objects.create(
+                wallet=wallet, entry_type='opening', amount=options['opening_balance'],
+                balance_after=options['opening_balance'],
+            )
+
+        lock = threading.Lock()
+        counts = {"credited": 0, "duplicate": 0, "withdrawn": 0, "refused": 0, "errors": 0}
+
+        def bump(key):
+            with lock:
+                counts[key] += 1
+
+        def worker(index):
+            try:
+                for op in range(options['ops']):
+                    try:
+                        if op % 2:
+                            # Threads 2k and 2k+1 race on the same reference
+                            ref = references[(index // 2) * options['ops'] + op]
+                            txn, entry = ledger.settle_deposit(ref)
+                            bump("credited" if entry else "duplicate")
+                        else:
+                            ledger.withdraw(Wallet(pk=wallet.pk), amount, description="stress test")
+                            bump("withdrawn")
+                    except (ledger.InsufficientFunds, ledger.LimitExceeded):
+                        bump("refused")
+                    except Exception as e:
+                        # e.g. "database is locked" on SQLite; the operation rolled back
+                        self.stderr.write(f"thread {index}: {e}")
+                        bump("errors")
+            finally:
+                close_old_connections()
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - started
+
+        wallet.refresh_from_db()
+        expected = options['opening_balance'] + amount * counts["credited"] - amount * counts["withdrawn"]
+        ledger_total = LedgerEntry.objects.filter(wallet=wallet).aggregate(total=Sum('amount'))['total'] or 0
+        settled = Transaction.objects.filter(wallet=wallet, transaction_type='credit', status='success').count()
+        ledger_credits = LedgerEntry.objects.filter(wallet=wallet, entry_type='credit').count()
+
+        self.stdout.write(f"{sum(counts.values())} operations in {elapsed:.2f}s: {counts}")
+        self.stdout.write(f"balance {wallet.user_balance}, expected {expected}, ledger sum {ledger_total}")
+
+        problems = []
+        if wallet.user_balance != expected:
+            problems.append("balance does not match the successful operations")
+        if wallet.user_balance != ledger_total:
+            problems.append("balance does not match the ledger")
+        if wallet.user_balance < 0:
+            problems.append("wallet overdrawn")
+        if not settled == ledger_credits == counts["credited"]:
+            problems.append("a deposit was credited more or less than once")
+
+        if not options['keep']:
+            user.delete()
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("OK"))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from medvaultapp.tasks import sweep_expired_qrcodes
+
+
+class Command(BaseCommand):
+    help = "Deactivate every QR code whose activation window has passed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help="Keep running and sweep every N seconds instead of once.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            swept, elapsed = sweep_expired_qrcodes()
+            self.stdout.write(f"Swept {swept} expired QR codes in {elapsed * 1000:.1f} ms")
+            if not options['every']:
+                break
+            time.sleep(options['every'])
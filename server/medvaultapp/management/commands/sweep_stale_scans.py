@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from medvaultapp.tasks import sweep_stale_scans
+
+
+class Command(BaseCommand):
+    help = "Rerun or fail food scans left pending or processing for too long."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes', type=int,
+            help="Treat scans older than this as stale (default FOOD_SCAN_STALE_MINUTES).",
+        )
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help="Keep running and sweep every N seconds instead of once.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            rerun, failed, elapsed = sweep_stale_scans(options['minutes'])
+            self.stdout.write(f"Reran {rerun} and failed {failed} stale food scans in {elapsed:.2f}s")
+            if not options['every']:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,174 @@
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import cloudinary.api
+from cloudinary.models import CloudinaryField
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import models
+
+
+# Folders written through Django's default storage. qr_codes/ has no field any
+# more, so everything left there is an orphan.
+STORAGE_PREFIXES = ['qr_codes/', 'profile_pics/']
+
+# Cloudinary's delete API accepts at most 100 public ids per call
+CLOUDINARY_DELETE_LIMIT = 100
+
+
+def cloudinary_tag():
+    """Tag put on every image this app uploads directly, which scopes the CloudinaryField sweep."""
+    return getattr(settings, 'CLOUDINARY_MEDIA_TAG', 'medvault')
+
+
+def default_min_age():
+    return timedelta(minutes=getattr(settings, 'MEDIA_GC_MIN_AGE_MINUTES', 60))
+
+
+@dataclass
+class SweepStats:
+    scanned: int = 0
+    orphans: int = 0
+    deleted: int = 0
+    too_recent: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.scanned / self.elapsed if self.elapsed else 0.0
+
+
+def _app_fields(field_class):
+    for model in apps.get_app_config('medvaultapp').get_models():
+        for f in model._meta.get_fields():
+            if isinstance(f, field_class):
+                yield model, f
+
+
+def referenced_storage_names():
+    names = set()
+    for model, f in _app_fields(models.FileField):
+        qs = model.objects.exclude(**{f.name: ''}).exclude(**{f'{f.name}__isnull': True})
+        names.update(qs.values_list(f.name, flat=True).iterator())
+    return names
+
+
+def referenced_cloudinary_ids():
+    ids = set()
+    for model, f in _app_fields(CloudinaryField):
+        for resource in model.objects.exclude(**{f'{f.name}__isnull': True}).values_list(f.name, flat=True).iterator():
+            if resource and getattr(resource, 'public_id', None):
+                ids.add(resource.public_id)
+    return ids
+
+
+def iter_local_pages(storage, prefix, page_size):
+    """Yield pages of (name, modified timestamp) pairs under `prefix`."""
+    root = storage.path(prefix)
+    if not os.path.isdir(root):
+        return
+    page = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel = os.path.relpath(dirpath, storage.location).replace(os.sep, '/')
+        for filename in filenames:
+            page.append((f'{rel}/{filename}', os.path.getmtime(os.path.join(dirpath, filename))))
+            if len(page) >= page_size:
+                yield page
+                page = []
+    if page:
+        yield page
+
+
+def _created_timestamp(resource):
+    return datetime.fromisoformat(resource['created_at'].replace('Z', '+00:00')).timestamp()
+
+
+def iter_cloudinary_pages(prefix=None, page_size=500, tag=None):
+    """Yield pages of (public id, created timestamp) pairs under `prefix`, or carrying `tag`."""
+    cursor = None
+    while True:
+        options = {'max_results': page_size}
+        if cursor:
+            options['next_cursor'] = cursor
+        if tag:
+            response = cloudinary.api.resources_by_tag(tag, **options)
+        else:
+            response = cloudinary.api.resources(type='upload', prefix=prefix, **options)
+        yield [(r['public_id'], _created_timestamp(r)) for r in response.get('resources', [])]
+        cursor = response.get('next_cursor')
+        if not cursor:
+            break
+
+
+def delete_storage_names(storage, names):
+    if isinstance(storage, FileSystemStorage):
+        for name in names:
+            storage.delete(name)
+        return
+    names = list(names)
+    for i in range(0, len(names), CLOUDINARY_DELETE_LIMIT):
+        cloudinary.api.delete_resources(names[i:i + CLOUDINARY_DELETE_LIMIT])
+
+
+def reconcile(pages, referenced, delete, batch_size, dry_run, stats, cutoff):
+    """Diff each listing page against `referenced` and delete orphans in batches.
+
+    Files written after `cutoff` (a timestamp) are left alone: their row may
+    not be committed yet, so they cannot be told apart from orphans.
+    """
+    batch = []
+    for page in pages:
+        stats.scanned += len(page)
+        settled = [name for name, modified in page if modified <= cutoff]
+        stats.too_recent += len(page) - len(settled)
+        orphans = set(settled) - referenced
+        stats.orphans += len(orphans)
+        if dry_run:
+            continue
+        batch.extend(orphans)
+        while len(batch) >= batch_size:
+            delete(batch[:batch_size])
+            stats.deleted += len(batch[:batch_size])
+            batch = batch[batch_size:]
+    if batch and not dry_run:
+        delete(batch)
+        stats.deleted += len(batch)
+    return stats
+
+
+def collect_orphaned_media(page_size=500, batch_size=100, dry_run=False, include_cloudinary_fields=False, min_age=None):
+    """Delete unreferenced media older than `min_age` (MEDIA_GC_MIN_AGE_MINUTES by default).
+
+    CloudinaryField uploads are only swept with `include_cloudinary_fields`,
+    and then only the ones carrying this app's tag.
+    """
+    stats = SweepStats()
+    cutoff = time.time() - (default_min_age() if min_age is None else min_age).total_seconds()
+
+    storage = default_storage
+    referenced = referenced_storage_names()
+    for prefix in STORAGE_PREFIXES:
+        if isinstance(storage, FileSystemStorage):
+            pages = iter_local_pages(storage, prefix, page_size)
+        else:
+            # django-cloudinary-storage names are the public ids under its PREFIX
+            storage_prefix = getattr(settings, 'CLOUDINARY_STORAGE', {}).get('PREFIX', settings.MEDIA_URL).strip('/')
+            pages = iter_cloudinary_pages(f'{storage_prefix}/{prefix}', page_size)
+        reconcile(pages, referenced, lambda names: delete_storage_names(storage, names), batch_size, dry_run, stats, cutoff)
+
+    if include_cloudinary_fields:
+        # CloudinaryField uploads share the account root with anything else on
+        # the account, so only images tagged as ours are candidates. Every
+        # CloudinaryField in the app counts as a reference.
+        referenced = referenced_cloudinary_ids()
+        pages = iter_cloudinary_pages(page_size=page_size, tag=cloudinary_tag())
+        reconcile(pages, referenced, cloudinary.api.delete_resources, min(batch_size, CLOUDINARY_DELETE_LIMIT), dry_run, stats, cutoff)
+
+    return stats
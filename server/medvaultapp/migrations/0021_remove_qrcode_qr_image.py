@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 09:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medvaultapp', '0020_qrcode_activated_at_qrcode_is_active'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='qrcode',
+            name='qr_image',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medvaultapp', '0021_remove_qrcode_qr_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='qrcode',
+            index=models.Index(fields=['is_active', 'activated_at'], name='qrcode_active_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medvaultapp', '0022_qrcode_qrcode_active_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='qrcode',
+            name='snapshot_html',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='qrcode',
+            name='snapshot_json',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medvaultapp', '0023_qrcode_snapshot_html_qrcode_snapshot_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodallergyscan',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='done', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='foodallergyscan',
+            name='error',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medvaultapp', '0024_foodallergyscan_status_foodallergyscan_error'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodallergyscan',
+            name='image_hash',
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+    ]
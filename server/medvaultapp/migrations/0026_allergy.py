@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-18 14:45
+
+import django.db.models.deletion
+import inflect
+from django.db import migrations, models
+
+
+# Frozen copy of medvaultapp.allergies.parse_allergies as of this migration,
+# so later changes to the live normalizer cannot change what it builds
+def parse_allergies(text, p):
+    names = set()
+    for allergy in (text or "").split(","):
+        name = " ".join(allergy.strip().lower().split())
+        if name:
+            names.add((p.singular_noun(name) or name)[:100].rstrip())
+    return names
+
+
+def build_allergy_index(apps, schema_editor):
+    p = inflect.engine()
+
+    EmergencyProfile = apps.get_model('medvaultapp', 'EmergencyProfile')
+    Allergy = apps.get_model('medvaultapp', 'Allergy')
+    rows = []
+    for profile_id, allergies in EmergencyProfile.objects.values_list('id', 'allergies').iterator():
+        rows.extend(Allergy(profile_id=profile_id, name=name) for name in parse_allergies(allergies, p))
+        if len(rows) >= 1000:
+            Allergy.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    Allergy.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medvaultapp', '0025_foodallergyscan_image_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Allergy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=100)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allergy_index', to='medvaultapp.emergencyprofile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('profile', 'name'), name='unique_profile_allergy')],
+            },
+        ),
+        migrations.RunPython(build_allergy_index, migrations.RunPython.noop),
+    ]
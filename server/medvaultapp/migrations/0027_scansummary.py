@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 15:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medvaultapp', '0026_allergy'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='scan_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_scans', models.PositiveIntegerField(default=0)),
+                ('low_count', models.PositiveIntegerField(default=0)),
+                ('medium_count', models.PositiveIntegerField(default=0)),
+                ('high_count', models.PositiveIntegerField(default=0)),
+                ('no_risk_count', models.PositiveIntegerField(default=0)),
+                ('allergen_counts', models.JSONField(blank=True, default=dict)),
+                ('daily_counts', models.JSONField(blank=True, default=dict)),
+                ('last_scan_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 15:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medvaultapp', '0027_scansummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodallergyscan',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='scan_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def open_ledgers(apps, schema_editor):
+    # Existing balances become opening entries so every ledger sums to its wallet balance
+    Wallet = apps.get_model('medvaultapp', 'Wallet')
+    LedgerEntry = apps.get_model('medvaultapp', 'LedgerEntry')
+    entries = [
+        LedgerEntry(wallet_id=wallet_id, entry_type='opening', amount=balance, balance_after=balance)
+        for wallet_id, balance in Wallet.objects.exclude(user_balance=0).values_list('id', 'user_balance').iterator()
+    ]
+    LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medvaultapp', '0028_foodallergyscan_scan_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_type', models.CharField(choices=[('opening', 'Opening balance'), ('credit', 'Credit'), ('debit', 'Debit')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('transaction', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entry', to='medvaultapp.transaction')),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger', to='medvaultapp.wallet')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['wallet', 'created_at'], name='ledger_wallet_created_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+def backfill_last_deposit(apps, schema_editor):
+    Wallet = apps.get_model('medvaultapp', 'Wallet')
+    Transaction = apps.get_model('medvaultapp', 'Transaction')
+    latest = (
+        Transaction.objects.filter(transaction_type='credit', status='success')
+        .values('wallet_id').annotate(last=models.Max('created_at'))
+    )
+    for row in latest.iterator():
+        Wallet.objects.filter(pk=row['wallet_id']).update(last_deposit_at=row['last'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medvaultapp', '0031_transaction_txn_status_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='last_deposit_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='wallet',
+            name='withdrawn_today',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='wallet',
+            name='withdrawn_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_last_deposit, migrations.RunPython.noop),
+    ]
@@ -37,6 +37,20 @@ class EmergencyProfile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Emergency Profile"
 
+
+class Allergy(models.Model):
+    """One normalized (singular, lowercase) allergy per row, kept in sync with EmergencyProfile.allergies."""
+    profile = models.ForeignKey(EmergencyProfile, on_delete=models.CASCADE, related_name='allergy_index')
+    name = models.CharField(max_length=100, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'name'], name='unique_profile_allergy'),
+        ]
+
+    def __str__(self):
+        return f"{self.profile.user.username}: {self.name}"
+
 # class QRCode(models.Model):
 #     profile = models.OneToOneField(EmergencyProfile, on_delete=models.CASCADE, related_name='qrcode')
 #     qr_token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
@@ -66,39 +80,50 @@ from django.utils import timezone
 from django.conf import settings
 import qrcode
 
+QR_ACTIVE_FOR = timedelta(hours=1)
+
 class QRCode(models.Model):
     profile = models.OneToOneField(EmergencyProfile, on_delete=models.CASCADE, related_name='qrcode')
     qr_token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
-    qr_image = models.ImageField(upload_to='qr_codes/', blank=True)
     is_active = models.BooleanField(default=False)
     activated_at = models.DateTimeField(null=True, blank=True)
+    # Pre-rendered responder views, rebuilt when the profile or its user changes
+    snapshot_html = models.TextField(blank=True, default='')
+    snapshot_json = models.TextField(blank=True, default='')
 
-    def generate_qr(self):
-        url = f"https://m7ml4rz4-8000.uks1.devtunnels.ms/emergency/{self.qr_token}/"
-        qr = qrcode.make(url)
-        buffer = BytesIO()
-        qr.save(buffer)
-        filename = f'{self.profile.user.username}_qr.png'
-        self.qr_image.save(filename, File(buffer), save=False)
-
-    def save(self, *args, **kwargs):
-        self.generate_qr()
-        super().save(*args, **kwargs)
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'activated_at'], name='qrcode_active_idx'),
+        ]
+
+    @classmethod
+    def sweep_expired(cls, now=None):
+        """Deactivate every expired code with one UPDATE and return the row count."""
+        cutoff = (now or timezone.now()) - QR_ACTIVE_FOR
+        return cls.objects.filter(
+            models.Q(activated_at__lt=cutoff) | models.Q(activated_at__isnull=True),
+            is_active=True,
+        ).update(is_active=False, activated_at=None)
 
     def is_expired(self):
         if not self.is_active or not self.activated_at:
             return True
-        return timezone.now() > self.activated_at + timedelta(hours=1)
+        return timezone.now() > self.activated_at + QR_ACTIVE_FOR
 
     def activate(self):
+        # Plain UPDATE: toggling activation only touches these two columns
         self.is_active = True
         self.activated_at = timezone.now()
-        self.save()
+        QRCode.objects.filter(pk=self.pk).update(is_active=True, activated_at=self.activated_at)
+        from .emergency_cache import invalidate_page
+        invalidate_page(self.qr_token)
 
     def deactivate(self):
         self.is_active = False
         self.activated_at = None
-        self.save()
+        QRCode.objects.filter(pk=self.pk).update(is_active=False, activated_at=None)
+        from .emergency_cache import invalidate_page
+        invalidate_page(self.qr_token)
 
     def __str__(self):
         return f"QR for {self.profile.user.username}"
@@ -115,6 +140,12 @@ class FoodAllergyScan(models.Model):
         ("medium", "Medium Risk"),
         ("high", "High Risk"),
     ]
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     food_name = models.CharField(max_length=100, blank=True, null=True)
@@ -122,18 +153,48 @@ class FoodAllergyScan(models.Model):
     detected_allergen = models.CharField(max_length=100, blank=True, null=True)
     confidence = models.FloatField(blank=True, null=True)
     risk_level = models.CharField(max_length=10, choices=RISK_CHOICES, blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="done")
+    image_hash = models.CharField(max_length=16, blank=True, null=True)  # Perceptual hash of food_image
+    error = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Scan history is read newest first per user, paged on (created_at, id)
+            models.Index(fields=['user', 'created_at', 'id'], name='scan_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.food_name or 'Image Scan'} ({self.risk_level})"
 
 
+class ScanSummary(models.Model):
+    """Running totals of a user's finished scans, updated as each scan completes (see scan_summary.py)."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='scan_summary')
+    total_scans = models.PositiveIntegerField(default=0)
+    low_count = models.PositiveIntegerField(default=0)
+    medium_count = models.PositiveIntegerField(default=0)
+    high_count = models.PositiveIntegerField(default=0)
+    no_risk_count = models.PositiveIntegerField(default=0)
+    allergen_counts = models.JSONField(default=dict, blank=True)  # allergen -> scans
+    daily_counts = models.JSONField(default=dict, blank=True)  # "YYYY-MM-DD" -> [scans, flagged scans]
+    last_scan_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username}: {self.total_scans} scans"
+
+
 class Wallet(models.Model):
     wallet_name = models.CharField(max_length=200, default="", unique=True)
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     user_balance = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     pin = models.PositiveIntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Limit counters, updated with the balance by ledger.py (see limits.py)
+    last_deposit_at = models.DateTimeField(blank=True, null=True)  # created_at of the latest settled deposit
+    withdrawn_today = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    withdrawn_on = models.DateField(blank=True, null=True)  # The day withdrawn_today counts
 
     def __str__(self):
         return f"{self.user.username}'s Wallet"
@@ -141,15 +202,51 @@ class Wallet(models.Model):
 class Transaction(models.Model):
     wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    payment_reference = models.CharField(max_length=100, blank=True, null=True)  # Add this line
+    payment_reference = models.CharField(max_length=100, blank=True, null=True, unique=True)  # Paystack reference; webhooks and callbacks look deposits up by it
     transaction_type = models.CharField(max_length=10)  # e.g., 'credit', 'debit'
     status = models.CharField(max_length=10, default='pending')  # e.g., 'credit', 'debit'
 
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Reconciliation reads pending deposits oldest first
+            models.Index(fields=['status', 'created_at'], name='txn_status_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.wallet.user.username} - {self.transaction_type} of {self.amount}"
+
+
+class LedgerEntry(models.Model):
+    """Append-only record of every wallet balance change; see ledger.py."""
+    ENTRY_TYPES = [
+        ("opening", "Opening balance"),
+        ("credit", "Credit"),
+        ("debit", "Debit"),
+    ]
+
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='ledger')
+    # Unique, so a transaction can move the balance at most once
+    transaction = models.OneToOneField(Transaction, on_delete=models.CASCADE, blank=True, null=True, related_name='ledger_entry')
+    entry_type = models.CharField(max_length=10, choices=ENTRY_TYPES)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)  # Signed: debits are negative
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['wallet', 'created_at'], name='ledger_wallet_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Ledger entries are append-only.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.wallet.user.username} {self.entry_type} {self.amount} -> {self.balance_after}"
     
 
 class Hospital(models.Model):
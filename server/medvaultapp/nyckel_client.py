@@ -0,0 +1,86 @@
+import threading
+import time
+from functools import lru_cache
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from requests.adapters import HTTPAdapter
+
+
+class NyckelClient:
+    """Process-wide Nyckel client.
+
+    Holds one OAuth token and refreshes it shortly before it expires, reuses
+    pooled keep-alive connections and applies explicit timeouts to every call.
+    """
+
+    def __init__(self, client_id, client_secret, server_url="https://www.nyckel.com",
+                 timeout=(3.05, 15), refresh_margin=60, pool_size=10):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.server_url = server_url.rstrip('/')
+        self.timeout = timeout
+        self.refresh_margin = refresh_margin
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fetch_token(self):
+        response = self.session.post(
+            f"{self.server_url}/connect/token",
+            data={
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        body = response.json()
+        self._token = body["access_token"]
+        self._expires_at = time.monotonic() + float(body.get("expires_in", 3600))
+
+    def token(self, force=False):
+        if not force and self._token and time.monotonic() < self._expires_at - self.refresh_margin:
+            return self._token
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            if force or not self._token or time.monotonic() >= self._expires_at - self.refresh_margin:
+                self._fetch_token()
+            return self._token
+
+    def invoke(self, function_id, data):
+        url = f"{self.server_url}/v1/functions/{function_id}/invoke"
+        token = self.token()
+        response = self.session.post(
+            url, json={"data": data}, headers={"Authorization": f"Bearer {token}"}, timeout=self.timeout,
+        )
+        if response.status_code == 401:
+            # Token revoked early; refresh once and retry
+            token = self.token(force=True)
+            response = self.session.post(
+                url, json={"data": data}, headers={"Authorization": f"Bearer {token}"}, timeout=self.timeout,
+            )
+        response.raise_for_status()
+        return response.json()
+
+
+@lru_cache(maxsize=1)
+def get_client():
+    if not (getattr(settings, 'NYCKEL_CLIENT_ID', None) and getattr(settings, 'NYCKEL_CLIENT_SECRET', None)):
+        raise ImproperlyConfigured("Set NYCKEL_CLIENT_ID and NYCKEL_CLIENT_SECRET to classify foods with Nyckel.")
+    return NyckelClient(
+        settings.NYCKEL_CLIENT_ID,
+        settings.NYCKEL_CLIENT_SECRET,
+        server_url=getattr(settings, 'NYCKEL_SERVER_URL', "https://www.nyckel.com"),
+        timeout=(
+            getattr(settings, 'NYCKEL_CONNECT_TIMEOUT', 3.05),
+            getattr(settings, 'NYCKEL_READ_TIMEOUT', 15),
+        ),
+        pool_size=getattr(settings, 'FOOD_SCAN_WORKERS', 4) * 2,
+    )
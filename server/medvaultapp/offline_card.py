@@ -0,0 +1,101 @@
+"""Signed emergency cards that can be read without a network.
+
+The QR holds the card itself as plain text, one ``Label: value`` line per
+field, so any phone camera shows it as is::
+
+    MEDVAULT EMERGENCY CARD
+    Blood type: O+
+    ...
+    Live profile: https://.../emergency/<token>/
+    Signature: <Ed25519 signature of every line above, base64url>
+
+The signature covers the UTF-8 text before the signature line. The decoder
+page embeds the public key, so a card can also be checked fully offline.
+"""
+import base64
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from urllib.parse import quote
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+from django.conf import settings
+
+from .qr import emergency_url
+
+
+CARD_TITLE = 'MEDVAULT EMERGENCY CARD'
+SIGNATURE_LABEL = 'Signature'
+CARD_FIELDS = [
+    ('blood_type', 'Blood type'),
+    ('genotype', 'Genotype'),
+    ('allergies', 'Allergies'),
+    ('conditions', 'Conditions'),
+    ('medications', 'Medications'),
+    ('emergency_contact_name', 'Emergency contact'),
+    ('emergency_contact_phone', 'Phone'),
+]
+# UTF-8 bytes per field value. QR capacity is counted in bytes, and seven
+# fields at this size plus the fixed lines fit one code at the default
+# error correction level (2331 bytes)
+MAX_FIELD_BYTES = 240
+ELLIPSIS = '…'
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+@lru_cache(maxsize=1)
+def _private_key():
+    seed = getattr(settings, 'OFFLINE_CARD_SIGNING_KEY', None)
+    if seed:
+        seed = _b64decode(seed)
+    else:
+        seed = hashlib.sha256(b'medvaultapp.offline-card' + settings.SECRET_KEY.encode()).digest()
+    return Ed25519PrivateKey.from_private_bytes(seed)
+
+
+def public_key_b64():
+    raw = _private_key().public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+    return _b64encode(raw)
+
+
+def _line_value(value):
+    # One field per line, so line breaks inside a value become spaces
+    value = ' '.join(str(value or '').split())
+    encoded = value.encode()
+    if len(encoded) > MAX_FIELD_BYTES:
+        # Cut on a character boundary, leaving room for the ellipsis
+        value = encoded[:MAX_FIELD_BYTES - len(ELLIPSIS.encode())].decode(errors='ignore') + ELLIPSIS
+    return value or '-'
+
+
+def card_text(profile, token, issued_at=None):
+    """The readable, unsigned part of the card."""
+    # Hour granularity keeps the text, and so the rendered QR, stable for a while
+    issued = datetime.fromtimestamp(int(issued_at or time.time()) // 3600 * 3600, tz=timezone.utc)
+    lines = [CARD_TITLE]
+    lines += [f"{label}: {_line_value(getattr(profile, name, ''))}" for name, label in CARD_FIELDS]
+    lines.append(f"Issued: {issued:%Y-%m-%d %H:%M} UTC")
+    lines.append(f"Live profile: {emergency_url(token)}")
+    return '\n'.join(lines)
+
+
+def encode_card(profile, token, issued_at=None):
+    """Return the QR content: the card text followed by its signature line."""
+    text = card_text(profile, token, issued_at)
+    signature = _private_key().sign(text.encode())
+    return f"{text}\n{SIGNATURE_LABEL}: {_b64encode(signature)}"
+
+
+def card_url(profile, token):
+    # The fragment never reaches a server, so the decoder page checks the card locally
+    base = settings.BASE_FRONTEND_URL.rstrip('/')
+    return f"{base}/emergency/card/#{quote(encode_card(profile, token), safe='')}"
@@ -0,0 +1,137 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+from functools import lru_cache
+from urllib.parse import quote
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger(__name__)
+
+# Worth another try: the request never reached Paystack or Paystack said so
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+def kobo_to_amount(value):
+    """Convert a Paystack amount (integer kobo) to naira, or None if it is not a positive whole number."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    try:
+        kobo = int(value)
+    except ValueError:
+        return None
+    return Decimal(kobo) / 100 if kobo > 0 else None
+
+
+class LatencyStats:
+    """Per-call latency counters, with a window of recent samples for percentiles."""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed, ok=True, retried=False):
+        with self._lock:
+            call = self._calls.setdefault(name, {
+                "count": 0, "errors": 0, "retries": 0, "total": 0.0, "max": 0.0,
+                "samples": deque(maxlen=self.window),
+            })
+            call["count"] += 1
+            call["errors"] += not ok
+            call["retries"] += retried
+            call["total"] += elapsed
+            call["max"] = max(call["max"], elapsed)
+            call["samples"].append(elapsed)
+
+    def stats(self):
+        with self._lock:
+            calls = {name: dict(call, samples=sorted(call["samples"])) for name, call in self._calls.items()}
+        result = {}
+        for name, call in calls.items():
+            samples = call.pop("samples")
+            result[name] = {
+                "count": call["count"],
+                "errors": call["errors"],
+                "retries": call["retries"],
+                "mean_ms": round(call["total"] / call["count"] * 1000, 2),
+                "p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+                "p95_ms": round(samples[max(int(len(samples) * 0.95) - 1, 0)] * 1000, 2),
+                "max_ms": round(call["max"] * 1000, 2),
+            }
+        return result
+
+
+class PaystackClient:
+    """Process-wide Paystack client.
+
+    Reuses pooled keep-alive connections, applies explicit timeouts to every
+    call and retries idempotent calls with jittered exponential backoff.
+    Calls that create something (initialize) are never retried.
+    """
+
+    def __init__(self, secret_key, base_url="https://api.paystack.co",
+                 timeout=(3.05, 10), max_retries=2, backoff=0.25, pool_size=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.metrics = LatencyStats()
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {secret_key}"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _request(self, name, method, path, idempotent, **kwargs):
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.metrics.record(name, time.perf_counter() - started, ok=False, retried=not last)
+                if last:
+                    raise
+            else:
+                retry = response.status_code in RETRY_STATUSES and not last
+                self.metrics.record(name, time.perf_counter() - started, ok=response.status_code < 500, retried=retry)
+                if not retry:
+                    return response
+            # Full jitter, so callers that failed together do not retry together
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            logger.info("Retrying Paystack %s in %.2fs (attempt %d of %d)", name, delay, attempt + 2, attempts)
+            time.sleep(delay)
+
+    def initialize(self, email, amount, reference, callback_url=None, metadata=None):
+        """Start a payment of `amount` kobo. Returns Paystack's JSON body."""
+        payload = {"email": email, "amount": amount, "reference": reference}
+        if callback_url:
+            payload["callback_url"] = callback_url
+        if metadata:
+            payload["metadata"] = metadata
+        return self._request("initialize", "POST", "/transaction/initialize", idempotent=False, json=payload).json()
+
+    def verify(self, reference):
+        """Look up a transaction by reference. Returns Paystack's JSON body."""
+        return self._request("verify", "GET", f"/transaction/verify/{quote(reference, safe='')}", idempotent=True).json()
+
+
+@lru_cache(maxsize=1)
+def get_client():
+    return PaystackClient(
+        settings.PAYSTACK_SECRET_KEY,
+        base_url=getattr(settings, 'PAYSTACK_BASE_URL', "https://api.paystack.co"),
+        timeout=(
+            getattr(settings, 'PAYSTACK_CONNECT_TIMEOUT', 3.05),
+            getattr(settings, 'PAYSTACK_READ_TIMEOUT', 10),
+        ),
+        max_retries=getattr(settings, 'PAYSTACK_MAX_RETRIES', 2),
+    )
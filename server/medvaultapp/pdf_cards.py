@@ -0,0 +1,99 @@
+import hashlib
+import json
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from .qr import emergency_url, render_qr
+from .snapshots import SNAPSHOT_FIELDS
+
+
+CARD_SIZES = {
+    'wallet': (85.6 * mm, 54 * mm),  # ID-1 / credit card
+    'a4': A4,
+}
+
+
+def _cache():
+    return caches[getattr(settings, 'EMERGENCY_CARD_CACHE', 'default')]
+
+
+def card_fields(profile):
+    fields = {name: getattr(profile, name) for name in SNAPSHOT_FIELDS}
+    fields['name'] = f"{profile.user.first_name} {profile.user.last_name}".strip() or profile.user.username
+    fields['qr_token'] = str(profile.qrcode.qr_token)
+    return fields
+
+
+def card_hash(fields, size):
+    body = json.dumps(fields, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(f"{size}:{body}".encode()).hexdigest()
+
+
+def render_card_pdf(fields, size='wallet'):
+    """Draw one emergency card and return the PDF bytes.
+
+    Takes plain data only so it can run in a worker process.
+    """
+    width, height = CARD_SIZES[size]
+    card_width, card_height = CARD_SIZES['wallet']
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=(width, height))
+    pdf.setTitle(f"MedVault Emergency Card - {fields['name']}")
+    if size != 'wallet':
+        # Printable pages carry the wallet layout at twice the size, top left
+        margin = 15 * mm
+        pdf.translate(margin, height - margin - 2 * card_height)
+        pdf.scale(2, 2)
+
+    pdf.setFillColorRGB(0.86, 0.21, 0.27)
+    pdf.rect(0, card_height - 9 * mm, card_width, 9 * mm, stroke=0, fill=1)
+    pdf.setFillColorRGB(1, 1, 1)
+    pdf.setFont('Helvetica-Bold', 9)
+    pdf.drawString(3 * mm, card_height - 6 * mm, "MEDVAULT EMERGENCY CARD")
+
+    png, etag = render_qr(emergency_url(fields['qr_token']), 'png')
+    qr_size = 26 * mm
+    pdf.drawImage(ImageReader(BytesIO(png)), card_width - qr_size - 2 * mm, 3 * mm, qr_size, qr_size)
+
+    pdf.setFillColorRGB(0, 0, 0)
+    lines = [
+        ('Name', fields['name']),
+        ('Blood', f"{fields['blood_type']}  Genotype: {fields['genotype']}"),
+        ('Allergies', fields['allergies']),
+        ('Conditions', fields['conditions']),
+        ('Medications', fields['medications']),
+        ('Contact', f"{fields['emergency_contact_name']} {fields['emergency_contact_phone']}"),
+    ]
+    y = card_height - 13 * mm
+    max_chars = 34
+    for label, value in lines:
+        pdf.setFont('Helvetica-Bold', 6)
+        pdf.drawString(3 * mm, y, f"{label}:")
+        pdf.setFont('Helvetica', 6)
+        text = str(value or '-')
+        pdf.drawString(16 * mm, y, text if len(text) <= max_chars else text[:max_chars - 1] + '…')
+        y -= 6.5 * mm
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def get_card_pdf(profile, size='wallet'):
+    """Return (pdf_bytes, content_hash), rendering only when the profile changed."""
+    fields = card_fields(profile)
+    digest = card_hash(fields, size)
+    key = f"emergency-card:{digest}"
+    pdf = _cache().get(key)
+    if pdf is None:
+        pdf = render_card_pdf(fields, size)
+        _cache().set(key, pdf, getattr(settings, 'EMERGENCY_CARD_CACHE_TIMEOUT', 7 * 24 * 3600))
+    return pdf, digest
+
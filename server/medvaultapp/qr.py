@@ -0,0 +1,88 @@
+import hashlib
+import time
+import uuid
+from functools import lru_cache
+from io import BytesIO
+
+import qrcode
+import qrcode.image.svg
+from django.conf import settings
+from django.core import signing
+
+from .models import QR_ACTIVE_FOR, QRCode
+
+
+QR_CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def emergency_url(token):
+    return f"{settings.BASE_FRONTEND_URL.rstrip('/')}/emergency/{token}/"
+
+
+def signed_emergency_url(signed):
+    return f"{settings.BASE_FRONTEND_URL.rstrip('/')}/emergency/s/{signed}/"
+
+
+def _signer():
+    return signing.Signer(salt='medvaultapp.qr', sep='.')
+
+
+def sign_qr_token(qrcode):
+    """Return a token that carries its own activation window.
+
+    Format: ``<qr_token>.<activated_at, base62>.<hmac>``. It is only valid for
+    the activation it was issued for, so reactivating invalidates old links.
+    """
+    start = int(qrcode.activated_at.timestamp())
+    return _signer().sign(f"{qrcode.qr_token}.{signing.b62_encode(start)}")
+
+
+def unsign_qr_token(signed):
+    """Return (qr_token, activated_ts) for a signed token.
+
+    Raises signing.BadSignature for forged or malformed tokens and
+    signing.SignatureExpired once the activation window has passed. No
+    database access happens here.
+    """
+    value = _signer().unsign(signed)
+    try:
+        token, start = value.split('.')
+        token, start = uuid.UUID(token), signing.b62_decode(start)
+    except ValueError:
+        raise signing.BadSignature('Malformed QR token.')
+    if time.time() > start + QR_ACTIVE_FOR.total_seconds():
+        raise signing.SignatureExpired('QR token has expired.')
+    return token, start
+
+
+def qr_data(token=None, signed=None):
+    """Return the URL to encode in the QR image, or None for an unknown or badly signed token."""
+    if signed is None:
+        # Only real codes are rendered, so made-up tokens cannot fill the render cache
+        if not QRCode.objects.filter(qr_token=token).exists():
+            return None
+        return emergency_url(token)
+    try:
+        unsign_qr_token(signed)
+    except signing.BadSignature:
+        return None
+    return signed_emergency_url(signed)
+
+
+@lru_cache(maxsize=getattr(settings, 'QR_RENDER_CACHE_SIZE', 1024))
+def render_qr(data, fmt):
+    """Render `data` as a QR image and return (bytes, etag).
+
+    The output only depends on the arguments, so results are kept in a bounded
+    in-process LRU cache.
+    """
+    buffer = BytesIO()
+    if fmt == 'svg':
+        qrcode.make(data, image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qrcode.make(data).save(buffer)
+    content = buffer.getvalue()
+    return content, hashlib.sha256(content).hexdigest()
@@ -0,0 +1,123 @@
+"""Settle or expire deposits whose owners never came back to verify-payment/.
+
+Pending deposits are read oldest first in keyset chunks off the
+(status, created_at) index. Each chunk's references are verified against
+Paystack on a bounded thread pool; only the HTTP calls run in threads, and
+the database writes stay on the calling thread.
+
+A deposit Paystack reports as paid for a different amount is never
+credited. It is logged and moved to status 'review' for someone to look at.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import ledger
+from .models import Transaction
+from .paystack_client import get_client, kobo_to_amount
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReconcileStats:
+    checked: int = 0
+    credited: int = 0
+    expired: int = 0
+    still_pending: int = 0
+    mismatched: int = 0
+    errors: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+
+def _verify(reference):
+    if not reference:
+        return None
+    try:
+        return get_client().verify(reference)
+    except (requests.RequestException, ValueError) as e:
+        return e
+
+
+def pending_deposits(min_age, chunk_size):
+    """Yield lists of pending deposits older than `min_age`, oldest first."""
+    cutoff = timezone.now() - min_age
+    pending = Transaction.objects.filter(status='pending', transaction_type='credit', created_at__lt=cutoff)
+    last = None
+    while True:
+        qs = pending
+        if last is not None:
+            qs = qs.filter(Q(created_at__gt=last.created_at) | Q(created_at=last.created_at, id__gt=last.id))
+        chunk = list(qs.order_by('created_at', 'id').only('id', 'payment_reference', 'amount', 'created_at')[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+def reconcile_pending_deposits(min_age=None, ttl=None, chunk_size=200, workers=None, dry_run=False):
+    """Credit pending deposits Paystack reports as paid and fail the ones older than `ttl`."""
+    if min_age is None:
+        min_age = timedelta(minutes=getattr(settings, 'DEPOSIT_RECONCILE_MIN_AGE_MINUTES', 15))
+    if ttl is None:
+        ttl = timedelta(hours=getattr(settings, 'DEPOSIT_PENDING_TTL_HOURS', 24))
+    workers = workers or getattr(settings, 'DEPOSIT_RECONCILE_WORKERS', 8)
+    expire_before = timezone.now() - ttl
+    stats = ReconcileStats()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='reconcile') as executor:
+        for chunk in pending_deposits(min_age, chunk_size):
+            expired = []
+            for deposit, body in zip(chunk, executor.map(_verify, [d.payment_reference for d in chunk])):
+                stats.checked += 1
+                if isinstance(body, Exception):
+                    # Paystack unreachable; leave it for the next run
+                    logger.warning("Verifying deposit %s failed: %s", deposit.payment_reference, body)
+                    stats.errors += 1
+                    continue
+                data = (body or {}).get('data') or {}
+                if body and body.get('status') and data.get('status') == 'success':
+                    paid = kobo_to_amount(data.get('amount'))
+                    if paid != deposit.amount:
+                        logger.warning(
+                            "Deposit %s is for %s but Paystack reports %r kobo paid; flagged for review",
+                            deposit.payment_reference, deposit.amount, data.get('amount'),
+                        )
+                        stats.mismatched += 1
+                        if not dry_run:
+                            ledger.flag_for_review(deposit)
+                        continue
+                    if dry_run:
+                        stats.credited += 1
+                        continue
+                    try:
+                        _, entry = ledger.settle_deposit(deposit.payment_reference, amount=paid)
+                    except Exception:
+                        logger.exception("Crediting deposit %s failed", deposit.payment_reference)
+                        stats.errors += 1
+                        continue
+                    # None: settled meanwhile by a webhook or verify-payment/
+                    stats.credited += entry is not None
+                elif deposit.created_at < expire_before:
+                    expired.append(deposit.pk)
+                else:
+                    stats.still_pending += 1
+
+            if expired and not dry_run:
+                # Conditional, so a deposit credited since we read it is left alone
+                Transaction.objects.filter(pk__in=expired, status='pending').update(status='failed')
+            stats.expired += len(expired)
+
+    return stats
@@ -0,0 +1,102 @@
+"""Per-user scan totals for the dashboard.
+
+Each finished scan is folded into the user's ScanSummary row as it is
+saved, so reading the dashboard is one primary-key lookup however long the
+scan history gets. `rebuild_summaries` recomputes rows from scratch and is
+what the backfill command uses.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .allergies import normalize_allergen
+from .models import FoodAllergyScan, ScanSummary
+
+
+RISK_LEVELS = ("low", "medium", "high")
+
+SUMMARY_FIELDS = [
+    'total_scans', 'low_count', 'medium_count', 'high_count', 'no_risk_count',
+    'allergen_counts', 'daily_counts', 'last_scan_at', 'updated_at',
+]
+
+
+def trend_days():
+    return getattr(settings, 'SCAN_SUMMARY_TREND_DAYS', 90)
+
+
+def _reset(summary):
+    summary.total_scans = 0
+    summary.low_count = summary.medium_count = summary.high_count = summary.no_risk_count = 0
+    summary.allergen_counts = {}
+    summary.daily_counts = {}
+    summary.last_scan_at = None
+
+
+def _add(summary, scan):
+    flagged = scan.risk_level in RISK_LEVELS
+    field = f"{scan.risk_level}_count" if flagged else "no_risk_count"
+    setattr(summary, field, getattr(summary, field) + 1)
+    summary.total_scans += 1
+
+    if scan.detected_allergen:
+        name = normalize_allergen(scan.detected_allergen)
+        summary.allergen_counts[name] = summary.allergen_counts.get(name, 0) + 1
+
+    day = timezone.localdate(scan.created_at).isoformat()
+    scans, flagged_scans = summary.daily_counts.get(day, (0, 0))
+    summary.daily_counts[day] = [scans + 1, flagged_scans + flagged]
+
+    if summary.last_scan_at is None or scan.created_at > summary.last_scan_at:
+        summary.last_scan_at = scan.created_at
+
+
+def _trim(summary):
+    # Only the trend window is kept; the counters cover all time
+    cutoff = (timezone.localdate() - timedelta(days=trend_days())).isoformat()
+    summary.daily_counts = {day: counts for day, counts in summary.daily_counts.items() if day > cutoff}
+    summary.updated_at = timezone.now()
+
+
+def _locked_summaries(user_ids):
+    """Create missing rows, then lock them all in user order so concurrent writers cannot deadlock."""
+    ScanSummary.objects.bulk_create([ScanSummary(user_id=u) for u in user_ids], ignore_conflicts=True)
+    return {s.user_id: s for s in ScanSummary.objects.select_for_update().filter(user_id__in=user_ids).order_by('pk')}
+
+
+def record_scans(scans):
+    """Fold newly finished scans into their users' summaries."""
+    scans = [scan for scan in scans if scan.status == "done"]
+    if not scans:
+        return
+    with transaction.atomic():
+        summaries = _locked_summaries({scan.user_id for scan in scans})
+        for scan in scans:
+            _add(summaries[scan.user_id], scan)
+        for summary in summaries.values():
+            _trim(summary)
+        ScanSummary.objects.bulk_update(summaries.values(), SUMMARY_FIELDS)
+
+
+def rebuild_summaries(user_ids, chunk_size=2000):
+    """Recompute the summaries of `user_ids` from their scans. Returns the number of scans read."""
+    read = 0
+    with transaction.atomic():
+        # Holding the row locks keeps scans that finish meanwhile from being lost or counted twice
+        summaries = _locked_summaries(user_ids)
+        for summary in summaries.values():
+            _reset(summary)
+        scans = (
+            FoodAllergyScan.objects.filter(user_id__in=user_ids, status="done")
+            .only('user', 'risk_level', 'detected_allergen', 'created_at')
+            .iterator(chunk_size=chunk_size)
+        )
+        for scan in scans:
+            _add(summaries[scan.user_id], scan)
+            read += 1
+        for summary in summaries.values():
+            _trim(summary)
+        ScanSummary.objects.bulk_update(summaries.values(), SUMMARY_FIELDS)
+    return read
@@ -0,0 +1,278 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import cloudinary.api
+import cloudinary.uploader
+import requests
+from cloudinary import CloudinaryResource
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .allergen_taxonomy import allergen_matches
+from .allergies import allergy_set, normalize_allergen
+from .classifier_cache import classifier_cache, food_key, image_key
+from .images import hamming
+from .local_allergens import classify_food
+from .media_gc import cloudinary_tag
+from .models import FoodAllergyScan
+from .nyckel_client import get_client
+from .scan_summary import record_scans
+
+
+logger = logging.getLogger(__name__)
+
+# Classification waits on Cloudinary and Nyckel, so threads are enough here
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'FOOD_SCAN_WORKERS', 4),
+    thread_name_prefix='food-scan',
+)
+
+
+def risk_for(singular_allergens, normalized_allergies, confidence, food_name):
+    if any(allergen_matches(allergen, normalized_allergies) for allergen in singular_allergens):
+        if confidence < 0.45:
+            return "low"
+        elif confidence > 0.45 and confidence < 0.7:
+            return "medium"
+        return "high"
+    return f"there are no allergy in {food_name}"
+
+
+def is_confident(local):
+    return local is not None and local["confidence"] >= getattr(settings, 'LOCAL_ALLERGEN_MIN_CONFIDENCE', 0.8)
+
+
+def can_classify_locally(food_name):
+    return bool(food_name) and is_confident(classify_food(food_name))
+
+
+def identify_food(image_url, image_data=None):
+    identify = lambda: get_client().invoke("meals-identifier", image_url)
+    if image_data is not None:
+        return classifier_cache.get_or_compute(image_key(image_data), identify)["labelName"]
+    return identify()["labelName"]
+
+
+def lookup_allergen(food_name):
+    """Return a Nyckel-shaped allergen result for `food_name`.
+
+    Common foods are answered locally and Nyckel results are cached by the
+    normalized name.
+    """
+    local = classify_food(food_name)
+    if is_confident(local):
+        return local
+    try:
+        return classifier_cache.get_or_compute(
+            food_key(food_name),
+            lambda: get_client().invoke("food-allergens", food_name),
+        )
+    except requests.RequestException:
+        if local is None:
+            raise
+        logger.warning("Nyckel unavailable, using local allergen match for %r", food_name)
+        return local
+
+
+def load_allergies(user_id):
+    # Normalized when the profile is saved, so this is a single indexed read
+    return allergy_set(user_id)
+
+
+def apply_result(scan, food_name, result, normalized_allergies):
+    detected_allergen = result["labelName"].strip().lower()
+    confidence = result["confidence"]
+
+    # Local results list every allergen in the food; Nyckel names one
+    singular_allergens = [normalize_allergen(a) for a in result.get("allergens") or [detected_allergen]]
+    for allergen in singular_allergens:
+        # Record the allergen the user reacts to, if any
+        if allergen_matches(allergen, normalized_allergies):
+            detected_allergen = allergen
+            break
+
+    scan.food_name = food_name
+    scan.detected_allergen = detected_allergen
+    scan.confidence = confidence
+    scan.risk_level = risk_for(singular_allergens, normalized_allergies, confidence, food_name)
+
+
+def classify(scan, image_data=None):
+    """Identify the food, look up its allergen and score it against the user's profile."""
+    if scan.food_image:
+        food_name = identify_food(scan.food_image.url, image_data)
+    else:
+        food_name = scan.food_name
+    apply_result(scan, food_name, lookup_allergen(food_name), load_allergies(scan.user_id))
+
+
+def recent_hashed_scans(user_id):
+    limit = getattr(settings, 'FOOD_IMAGE_DUPLICATE_LOOKBACK', 200)
+    return list(
+        FoodAllergyScan.objects.filter(user_id=user_id, status="done", image_hash__isnull=False)
+        .order_by('-created_at')
+        .only('food_name', 'food_image', 'detected_allergen', 'confidence', 'image_hash')[:limit]
+    )
+
+
+def find_duplicate(phash, candidates):
+    """Return the first earlier scan whose image is a near-duplicate of `phash`."""
+    threshold = getattr(settings, 'FOOD_IMAGE_DUPLICATE_DISTANCE', 6)
+    for candidate in candidates:
+        if hamming(candidate.image_hash, phash) <= threshold:
+            return candidate
+    return None
+
+
+def reuse_result(scan, source, normalized_allergies):
+    # Same food as before, but the risk is re-scored against today's allergies
+    scan.food_image = source.food_image
+    result = {"labelName": source.detected_allergen or "", "confidence": source.confidence or 0.0}
+    local = classify_food(source.food_name or "")
+    if is_confident(local):
+        # Only one allergen was stored, so take the full list again
+        result = local
+    apply_result(scan, source.food_name, result, normalized_allergies)
+
+
+def process_scan(scan_id, image=None):
+    """Run one queued scan to completion. `image` is (name, bytes, content_type) when not yet uploaded."""
+    close_old_connections()
+    try:
+        scan = FoodAllergyScan.objects.get(pk=scan_id)
+        scan.status = "processing"
+        scan.save(update_fields=["status"])
+
+        if image is not None:
+            name, data, content_type = image
+            scan.food_image, _ = upload_food_image(data)
+            scan.save(update_fields=["food_image"])
+
+        classify(scan, image[1] if image is not None else None)
+        scan.status = "done"
+        scan.save(update_fields=["food_name", "detected_allergen", "confidence", "risk_level", "status"])
+    except Exception as e:
+        logger.exception("Food scan %s failed", scan_id)
+        FoodAllergyScan.objects.filter(pk=scan_id).update(status="failed", error=str(e))
+    finally:
+        close_old_connections()
+
+
+def upload_food_image(data):
+    """Upload a food photo to Cloudinary and return (resource, secure url).
+
+    Uploads are tagged so collect_orphaned_media can tell them apart from
+    anything else stored on the account.
+    """
+    upload = cloudinary.uploader.upload(data, resource_type='image', tags=[cloudinary_tag()])
+    resource = CloudinaryResource(
+        upload['public_id'], version=upload.get('version'), format=upload.get('format'),
+        type=upload.get('type', 'upload'), resource_type=upload.get('resource_type', 'image'),
+    )
+    return resource, upload['secure_url']
+
+
+def enqueue_scan(scan, image=None):
+    # Wait for the row to be committed so the worker can see it
+    transaction.on_commit(lambda: _executor.submit(process_scan, scan.pk, image))
+
+
+def sweep_stale_scans(max_age, now=None):
+    """Finish scans left pending or processing for longer than `max_age`. Returns (rerun, failed).
+
+    The queue lives in process memory, so a restart drops whatever it held.
+    Scans that can be redone from their row (a food name or an uploaded
+    photo) are run again here; the rest are failed so clients stop polling.
+    """
+    cutoff = (now or timezone.now()) - max_age
+    stale = FoodAllergyScan.objects.filter(status__in=["pending", "processing"], created_at__lt=cutoff)
+    failed = stale.filter(
+        Q(food_name__isnull=True) | Q(food_name=""),
+        Q(food_image__isnull=True) | Q(food_image=""),
+    ).update(status="failed", error="The scan was interrupted before its photo was uploaded. Please scan again.")
+
+    rerun = list(stale.values_list("pk", flat=True))
+    for scan_id in rerun:
+        process_scan(scan_id)
+    return len(rerun), failed
+
+
+# Batch requests wait on this pool, so it is separate from the queued-scan pool
+_batch_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'FOOD_SCAN_BATCH_WORKERS', 8),
+    thread_name_prefix='food-scan-batch',
+)
+
+
+def discard_uploads(resources):
+    """Best-effort delete of uploads that no scan row will reference."""
+    public_ids = [r.public_id for r in resources if r is not None]
+    if not public_ids:
+        return
+    try:
+        cloudinary.api.delete_resources(public_ids)
+    except Exception:
+        logger.exception("Could not delete %d orphaned food images", len(public_ids))
+
+
+def _classify_item(item):
+    food_name, image = item
+    food_image = None
+    try:
+        if image is not None:
+            food_image, url = upload_food_image(image.data)
+            food_name = identify_food(url, image.data)
+        return food_name, food_image, lookup_allergen(food_name)
+    except Exception:
+        # The item fails, so its photo would never be referenced
+        discard_uploads([food_image])
+        raise
+
+
+def classify_batch(user, items):
+    """Classify `items` concurrently and insert every successful scan in one query.
+
+    `items` is a list of (food_name, image) pairs where image is a
+    PreparedImage or None. Returns one entry per item, either a saved
+    FoodAllergyScan or the exception that item raised.
+    """
+    # Allergies and earlier image hashes are loaded once for the whole batch
+    normalized_allergies = load_allergies(user.id)
+    candidates = recent_hashed_scans(user.id) if any(image for name, image in items) else []
+
+    futures = []
+    for food_name, image in items:
+        duplicate = find_duplicate(image.phash, candidates) if image is not None else None
+        futures.append(duplicate or _batch_executor.submit(_classify_item, (food_name, image)))
+
+    outcomes = []
+    for (food_name, image), future in zip(items, futures):
+        scan = FoodAllergyScan(user=user, status="done", image_hash=image.phash if image else None)
+        if isinstance(future, FoodAllergyScan):
+            reuse_result(scan, future, normalized_allergies)
+            outcomes.append(scan)
+            continue
+        try:
+            food_name, food_image, result = future.result()
+        except Exception as e:
+            logger.warning("Batch food scan item failed: %s", e)
+            outcomes.append(e)
+            continue
+        scan.food_image = food_image
+        apply_result(scan, food_name, result, normalized_allergies)
+        outcomes.append(scan)
+
+    try:
+        scans = FoodAllergyScan.objects.bulk_create([o for o in outcomes if isinstance(o, FoodAllergyScan)])
+    except Exception:
+        # Reused photos belong to earlier scans; only this batch's uploads go
+        discard_uploads([
+            outcome.food_image for outcome, future in zip(outcomes, futures)
+            if isinstance(outcome, FoodAllergyScan) and not isinstance(future, FoodAllergyScan)
+        ])
+        raise
+    # bulk_create sends no post_save, so the summary is updated here
+    record_scans(scans)
+    return outcomes
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import *
@@ -72,8 +74,8 @@ from .models import FoodAllergyScan
 class FoodAllergyScanSerializer(serializers.ModelSerializer):
     class Meta:
         model = FoodAllergyScan
-        fields = ['id', 'user', 'food_name', 'food_image', 'detected_allergen', 'confidence', 'risk_level', 'created_at']
-        read_only_fields = ['user', 'detected_allergen', 'confidence', 'risk_level', 'created_at']
+        fields = ['id', 'user', 'food_name', 'food_image', 'detected_allergen', 'confidence', 'risk_level', 'status', 'error', 'created_at']
+        read_only_fields = ['user', 'detected_allergen', 'confidence', 'risk_level', 'status', 'error', 'created_at']
 
 
 class WalletSerializer(serializers.ModelSerializer):
@@ -88,6 +90,9 @@ class WalletSerializer(serializers.ModelSerializer):
         return value
 
 class TransactionSerializer(serializers.ModelSerializer):
+    # Deposits and withdrawals move money by this amount, so it must be positive
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+
     class Meta:
         model = Transaction
         fields = ['id', 'amount', 'transaction_type', 'created_at', 'status']
@@ -124,4 +129,35 @@ class HospitalSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = [
             'id', 'user', 'is_verified', 'created_at', 'updated_at'
-        ]
\ No newline at end of file
+        ]
+
+from datetime import timedelta
+from django.utils import timezone
+from .models import ScanSummary
+
+class ScanSummarySerializer(serializers.ModelSerializer):
+    top_allergens = serializers.SerializerMethodField()
+    trend = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ScanSummary
+        fields = [
+            'total_scans', 'low_count', 'medium_count', 'high_count', 'no_risk_count',
+            'top_allergens', 'trend', 'last_scan_at', 'updated_at',
+        ]
+
+    def get_top_allergens(self, obj):
+        top = self.context.get('top', 5)
+        ranked = sorted(obj.allergen_counts.items(), key=lambda item: (-item[1], item[0]))[:top]
+        return [{"allergen": name, "scans": count} for name, count in ranked]
+
+    def get_trend(self, obj):
+        # One entry per day, oldest first, with zeros for days without scans
+        days = self.context.get('days', 30)
+        today = timezone.localdate()
+        trend = []
+        for offset in range(days - 1, -1, -1):
+            day = (today - timedelta(days=offset)).isoformat()
+            scans, flagged = obj.daily_counts.get(day, (0, 0))
+            trend.append({"date": day, "scans": scans, "flagged": flagged})
+        return trend
@@ -1,8 +1,47 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import *
+from .allergies import sync_allergy_index
+from .emergency_cache import invalidate_page
+from .scan_summary import record_scans
+from .snapshots import SNAPSHOT_USER_FIELDS, rebuild_snapshot
 
 @receiver(post_save, sender=EmergencyProfile)
 def create_or_update_qrcode(sender, instance, **kwargs):
-    qrcode_obj, created = QRCode.objects.get_or_create(profile=instance)
-    qrcode_obj.save()
+    QRCode.objects.get_or_create(profile=instance)
+    rebuild_snapshot(instance)
+
+
+@receiver(post_save, sender=EmergencyProfile)
+def update_allergy_index(sender, instance, **kwargs):
+    sync_allergy_index(instance)
+
+
+@receiver(post_save, sender=EmergencyProfile)
+def invalidate_emergency_page(sender, instance, created, **kwargs):
+    if created:
+        return
+    for token in QRCode.objects.filter(profile=instance).values_list('qr_token', flat=True):
+        invalidate_page(token)
+
+
+@receiver(post_save, sender=CustomUser)
+def refresh_user_snapshot(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no snapshot shows
+    if created or (update_fields is not None and not SNAPSHOT_USER_FIELDS & set(update_fields)):
+        return
+    profile = EmergencyProfile.objects.filter(user=instance).first()
+    if profile is None:
+        return
+    profile.user = instance
+    rebuild_snapshot(profile)
+    invalidate_emergency_page(EmergencyProfile, profile, created=False)
+
+
+@receiver(post_save, sender=FoodAllergyScan)
+def update_scan_summary(sender, instance, created, update_fields=None, **kwargs):
+    # Count each scan once: when it is created finished, or when its status moves to done
+    if instance.status != "done":
+        return
+    if created or (update_fields is not None and "status" in update_fields):
+        record_scans([instance])
@@ -0,0 +1,51 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.template.loader import render_to_string
+
+from .models import EmergencyProfile, QRCode
+
+
+SNAPSHOT_FIELDS = [
+    'blood_type',
+    'genotype',
+    'weight',
+    'allergies',
+    'conditions',
+    'medications',
+    'vaccination_history',
+    'dietary_restrictions',
+    'smoking_status',
+    'alcohol_consumption',
+    'physical_activity_level',
+    'emergency_contact_name',
+    'emergency_contact_phone',
+]
+
+# Only these user columns appear in a snapshot
+SNAPSHOT_USER_FIELDS = {'first_name', 'last_name'}
+
+SNAPSHOT_COLUMNS = ['qr_token', 'is_active', 'activated_at', 'snapshot_html', 'snapshot_json']
+
+
+def build_snapshot(profile):
+    """Return the (html, json) a responder sees for `profile`."""
+    data = {name: getattr(profile, name) for name in SNAPSHOT_FIELDS}
+    data['first_name'] = profile.user.first_name
+    data['last_name'] = profile.user.last_name
+    html = render_to_string('medvaultapp/emergency_profile.html', {"profile": profile})
+    return html, json.dumps(data, cls=DjangoJSONEncoder)
+
+
+def rebuild_snapshot(profile):
+    html, data = build_snapshot(profile)
+    QRCode.objects.filter(profile=profile).update(snapshot_html=html, snapshot_json=data)
+    return html, data
+
+
+def ensure_snapshot(qrcode):
+    # Rows written before snapshots existed are filled in on first read
+    if not qrcode.snapshot_html:
+        profile = EmergencyProfile.objects.select_related('user').get(pk=qrcode.profile_id)
+        qrcode.snapshot_html, qrcode.snapshot_json = rebuild_snapshot(profile)
+    return qrcode
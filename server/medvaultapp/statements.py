@@ -0,0 +1,141 @@
+"""Wallet statements as CSV or PDF.
+
+Transactions are read with a server-side cursor, joined to their ledger
+entry for the running balance. CSV is yielded row by row, so its memory
+stays flat however long the history is. reportlab keeps every PDF page in
+memory until the document is saved, so PDF memory grows with the rows
+drawn; PDFs are capped at STATEMENT_PDF_MAX_ROWS rows and longer ranges
+must be narrowed or exported as CSV.
+"""
+import csv
+import re
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from .models import Transaction
+
+
+COLUMNS = ['Date', 'Reference', 'Type', 'Status', 'Description', 'Amount', 'Balance']
+
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+_NUMBER_RE = re.compile(r'-?\d+(\.\d+)?')
+
+
+class StatementTooLong(ValueError):
+    pass
+
+
+def pdf_max_rows():
+    return getattr(settings, 'STATEMENT_PDF_MAX_ROWS', 5000)
+
+
+def statement_transactions(wallet, **filters):
+    """Iterate `wallet`'s transactions oldest first, each with its ledger entry in the same row."""
+    return (
+        Transaction.objects.filter(wallet=wallet, **filters)
+        .select_related('ledger_entry')
+        .order_by('created_at', 'id')
+        .iterator(chunk_size=getattr(settings, 'STATEMENT_CHUNK_SIZE', 500))
+    )
+
+
+def statement_row(txn):
+    entry = getattr(txn, 'ledger_entry', None)
+    amount = -txn.amount if txn.transaction_type == 'debit' else txn.amount
+    return [
+        timezone.localtime(txn.created_at).strftime('%Y-%m-%d %H:%M'),
+        txn.payment_reference or '',
+        txn.transaction_type,
+        txn.status,
+        txn.description or '',
+        f"{amount:.2f}",
+        f"{entry.balance_after:.2f}" if entry else '',
+    ]
+
+
+def owner_name(wallet):
+    user = wallet.user
+    return f"{user.first_name} {user.last_name}".strip() or user.username
+
+
+def csv_cell(value):
+    """Quote user-controlled text so spreadsheets show it instead of evaluating it."""
+    value = str(value)
+    if value.startswith(FORMULA_PREFIXES) and not _NUMBER_RE.fullmatch(value):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """csv.writer target that hands each row back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(wallet, transactions):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(['MedVault wallet statement'])
+    yield writer.writerow(['Wallet', csv_cell(wallet.wallet_name)])
+    yield writer.writerow(['Owner', csv_cell(owner_name(wallet))])
+    yield writer.writerow(['Generated', timezone.localtime().strftime('%Y-%m-%d %H:%M')])
+    yield writer.writerow([])
+    yield writer.writerow(COLUMNS)
+    for txn in transactions:
+        yield writer.writerow([csv_cell(value) for value in statement_row(txn)])
+
+
+# x offsets of COLUMNS on an A4 page, and the most characters each one shows
+PDF_COLUMNS = [(15, 16), (45, 22), (85, 7), (100, 8), (117, 24), (160, 12), (182, 12)]
+
+
+def render_pdf(wallet, transactions, max_rows=None):
+    """Draw the statement and return it as an open file positioned at the start.
+
+    Raises StatementTooLong after `max_rows` rows (STATEMENT_PDF_MAX_ROWS by default).
+    """
+    max_rows = pdf_max_rows() if max_rows is None else max_rows
+    out = SpooledTemporaryFile(max_size=getattr(settings, 'STATEMENT_PDF_SPOOL_SIZE', 5 * 1024 * 1024))
+    width, height = A4
+    pdf = canvas.Canvas(out, pagesize=A4)
+    pdf.setTitle(f"MedVault Wallet Statement - {wallet.wallet_name}")
+    page = 1
+
+    def header():
+        pdf.setFont('Helvetica-Bold', 14)
+        pdf.drawString(15 * mm, height - 20 * mm, "MedVault Wallet Statement")
+        pdf.setFont('Helvetica', 9)
+        pdf.drawString(15 * mm, height - 27 * mm, f"{wallet.wallet_name} - {owner_name(wallet)}")
+        pdf.drawRightString(width - 15 * mm, height - 27 * mm, f"Page {page}")
+        pdf.setFont('Helvetica-Bold', 8)
+        for (x, _), title in zip(PDF_COLUMNS, COLUMNS):
+            pdf.drawString(x * mm, height - 36 * mm, title)
+        pdf.line(15 * mm, height - 38 * mm, width - 15 * mm, height - 38 * mm)
+        pdf.setFont('Helvetica', 7)
+        return height - 43 * mm
+
+    y = header()
+    for rows, txn in enumerate(transactions, 1):
+        if rows > max_rows:
+            out.close()
+            raise StatementTooLong(
+                f"PDF statements are limited to {max_rows} transactions. Narrow the dates or download the CSV."
+            )
+        if y < 15 * mm:
+            pdf.showPage()
+            page += 1
+            y = header()
+        for (x, max_chars), value in zip(PDF_COLUMNS, statement_row(txn)):
+            pdf.drawString(x * mm, y, value if len(value) <= max_chars else value[:max_chars - 1] + '…')
+        y -= 5 * mm
+
+    pdf.showPage()
+    pdf.save()
+    out.seek(0)
+    return out
@@ -0,0 +1,40 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+
+from .models import QRCode
+from .reconciliation import reconcile_pending_deposits as reconcile
+from .scanning import sweep_stale_scans as sweep_scans
+
+
+logger = logging.getLogger(__name__)
+
+
+# Entry points for periodic jobs (cron, Heroku Scheduler or a clock process)
+
+def sweep_expired_qrcodes():
+    started = time.monotonic()
+    swept = QRCode.sweep_expired()
+    elapsed = time.monotonic() - started
+    logger.info("Swept %d expired QR codes in %.3fs", swept, elapsed)
+    return swept, elapsed
+
+
+def sweep_stale_scans(minutes=None):
+    started = time.monotonic()
+    max_age = timedelta(minutes=minutes or getattr(settings, 'FOOD_SCAN_STALE_MINUTES', 10))
+    rerun, failed = sweep_scans(max_age)
+    elapsed = time.monotonic() - started
+    logger.info("Swept stale food scans in %.3fs: %d rerun, %d failed", elapsed, rerun, failed)
+    return rerun, failed, elapsed
+
+
+def reconcile_pending_deposits():
+    stats = reconcile()
+    logger.info(
+        "Reconciled %d pending deposits in %.1fs: %d credited, %d expired, %d mismatched, %d errors",
+        stats.checked, stats.elapsed, stats.credited, stats.expired, stats.mismatched, stats.errors,
+    )
+    return stats
@@ -10,16 +10,31 @@ urlpatterns = [
     path('authentication/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('emergency/<uuid:token>/', emergency_profile_view, name='emergency-profile'),
+    path('emergency/s/<str:signed>/', signed_emergency_profile_view, name='emergency-profile-signed'),
+    path('emergency/card/', offline_card_view, name='offline-card'),
+    path('api/emergency/<uuid:token>/', emergency_snapshot_view, name='emergency-snapshot'),
     path('api/emergency-profile/', EmergencyProfileView.as_view(), name='emergency-profile-api'),
     path('api/get-qrcode/', QRCodeView.as_view(), name='get-qrcode'),
+    path('qr/<uuid:token>.<str:fmt>', qr_image_view, name='qr-image'),
+    path('qr/s/<str:signed>.<str:fmt>', qr_image_view, name='qr-image-signed'),
+    path('api/offline-card-qr.<str:fmt>', OfflineCardQRView.as_view(), name='offline-card-qr'),
+    path('api/emergency-card/', EmergencyCardPDFView.as_view(), name='emergency-card'),
     path('scan-food/', FoodAllergyScanView.as_view(), name='scan-food'),
+    path('scan-food/batch/', FoodAllergyScanBatchView.as_view(), name='scan-food-batch'),
+    path('scan-food/<int:pk>/', FoodAllergyScanStatusView.as_view(), name='scan-food-status'),
+    path('scan-food/cache-stats/', ClassifierCacheStatsView.as_view(), name='scan-food-cache-stats'),
+    path('paystack/client-stats/', PaystackClientStatsView.as_view(), name='paystack-client-stats'),
+    path('scan-food/summary/', ScanSummaryView.as_view(), name='scan-food-summary'),
+    path('allergens/users/', AllergenUsersView.as_view(), name='allergen_users'),
     path("wallet/wallet/", CreateWalletView.as_view(), name="create_wallet" ),
     path("wallet/deposit_money/", CreateTransactionView.as_view(), name="deposit_money"),
     path("wallet/transactions_list/", TransactionListView.as_view(), name="transaction_list"),
+    path("wallet/statement.<str:fmt>", WalletStatementView.as_view(), name="wallet_statement"),
     path("wallet/withdraw_money/", WithdrawMoneyView.as_view(), name="witdraw_money"),
     path("wallet/your_balance/", GetUserBalance.as_view(), name="get_balance"),
     path("your_scan_history/", FoodAllergyScanListView.as_view(), name="scan_history"),
     path('verify-payment/', verify_payment, name='verify_payment'),  # Add this line
+    path('paystack/webhook/', paystack_webhook, name='paystack_webhook'),
     # path("your_scan_history/", FoodAllergyScanListView.as_view(), name="scan_history"),
     path("send_message/", SendmessageToContact.as_view(), name="send_message"),
     path("get_user_info/", UserBasicInfo.as_view(), name="get_user_info"),
@@ -28,6 +43,7 @@ urlpatterns = [
     path("hospital/verified_hospitals/", GetVerifiedHospitals.as_view(), name="verified_hospitals"),
     path('qr/activate/', ActivateQRCodeView.as_view()),
     path('emergency/<uuid:token>/', QRCodeStatusPublicView.as_view()),  
+    path('qr/status/s/<str:signed>/', QRCodeStatusPublicView.as_view(), name='qr-status-signed'),
 
 
 
@@ -12,18 +12,26 @@ from django.shortcuts import render, get_object_or_404
 from .models import *
 from drf_spectacular.utils import extend_schema
 from django.views.decorators.csrf import csrf_exempt
+import logging
 import requests
-import nyckel
-import inflect
-import nyckel
 from django.utils import timezone
 from datetime import timedelta
 from django.http import JsonResponse
+from PIL import Image, UnidentifiedImageError
+from .allergies import normalize_allergen
+from .images import prepare_image
+from .scanning import (
+    can_classify_locally, classify, classify_batch, enqueue_scan, find_duplicate, load_allergies,
+    recent_hashed_scans, reuse_result,
+)
+from .classifier_cache import classifier_cache
+from .paystack_client import get_client as get_paystack_client, kobo_to_amount
 # from django.contrib.gis.geos import Point
 # from django.contrib.gis.db.models.functions import Distance
 
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 def index(request):
@@ -70,19 +78,66 @@ from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
 from .models import QRCode
 
+def render_emergency_page(request, qrcode):
+    content = ensure_snapshot(qrcode).snapshot_html.encode()
+    cache_page(qrcode, content)
+    return HttpResponse(content)
+
+
 def emergency_profile_view(request, token):
-    qrcode = get_object_or_404(QRCode, qr_token=token)
+    # Repeat scans inside the activation window skip the ORM entirely
+    content = get_cached_page(token)
+    if content is not None:
+        return HttpResponse(content)
+
+    qrcode = get_object_or_404(QRCode.objects.only(*SNAPSHOT_COLUMNS, 'profile'), qr_token=token)
 
     if qrcode.is_expired():
         return render(request, 'medvaultapp/inactive.html', status=403)  # 🚫 Inactive page
 
-    profile = qrcode.profile
+    return render_emergency_page(request, qrcode)
 
-    context = {
-        "profile" : profile
-    }
 
-    return render(request, 'medvaultapp/emergency_profile.html', context)
+def emergency_snapshot_view(request, token):
+    qrcode = get_object_or_404(QRCode.objects.only(*SNAPSHOT_COLUMNS, 'profile'), qr_token=token)
+
+    if qrcode.is_expired():
+        return JsonResponse({"detail": "QR code is inactive or expired."}, status=403)
+
+    return HttpResponse(ensure_snapshot(qrcode).snapshot_json, content_type='application/json')
+
+
+from django.core import signing
+from django.http import HttpResponse
+from .emergency_cache import cache_page, get_cached_page
+from .qr import unsign_qr_token
+from .snapshots import SNAPSHOT_COLUMNS, ensure_snapshot
+
+
+def get_live_qrcode(token, start):
+    qrcode = QRCode.objects.only(*SNAPSHOT_COLUMNS, 'profile').filter(qr_token=token, is_active=True).first()
+    if qrcode is None or qrcode.is_expired() or int(qrcode.activated_at.timestamp()) != start:
+        return None
+    return qrcode
+
+
+def signed_emergency_profile_view(request, signed):
+    # Forged and stale tokens are rejected from the signature alone, so only
+    # tokens inside their activation window reach the cache or the database
+    try:
+        token, start = unsign_qr_token(signed)
+    except signing.BadSignature:
+        return render(request, 'medvaultapp/inactive.html', status=403)
+
+    content = get_cached_page(token, start)
+    if content is not None:
+        return HttpResponse(content)
+
+    qrcode = get_live_qrcode(token, start)
+    if qrcode is None:
+        return render(request, 'medvaultapp/inactive.html', status=403)
+
+    return render_emergency_page(request, qrcode)
 
 
 class EmergencyProfileView(APIView):
@@ -145,6 +200,17 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.shortcuts import get_object_or_404
 from .models import QRCode
 
+def signed_qr_urls(request, qrcode):
+    # Signed links are only issued while the code is live
+    if qrcode.is_expired():
+        return {}
+    signed = sign_qr_token(qrcode)
+    return {
+        "signed_url": request.build_absolute_uri(reverse('emergency-profile-signed', args=[signed])),
+        "signed_qr_image_url": request.build_absolute_uri(reverse('qr-image-signed', args=[signed, 'png'])),
+    }
+
+
 class QRCodeView(APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
@@ -153,19 +219,121 @@ class QRCodeView(APIView):
         try:
             profile = request.user.emergencyprofile
             qrcode = profile.qrcode
-            if not qrcode.qr_image:
-                qrcode.save()
 
             return Response({
                 "qr_token": str(qrcode.qr_token),
-                "qr_image_url": request.build_absolute_uri(qrcode.qr_image.url),
+                "qr_image_url": request.build_absolute_uri(reverse('qr-image', args=[qrcode.qr_token, 'png'])),
+                "qr_svg_url": request.build_absolute_uri(reverse('qr-image', args=[qrcode.qr_token, 'svg'])),
                 "is_active": qrcode.is_active,
-                "expires_in_minutes": (60 - int((timezone.now() - qrcode.activated_at).total_seconds() // 60)) if qrcode.is_active else None
+                "expires_in_minutes": (60 - int((timezone.now() - qrcode.activated_at).total_seconds() // 60)) if qrcode.is_active else None,
+                "offline_card_url": card_url(profile, qrcode.qr_token),
+                "offline_qr_image_url": request.build_absolute_uri(reverse('offline-card-qr', args=['png'])),
+                **signed_qr_urls(request, qrcode),
             }, status=status.HTTP_200_OK)
 
         except EmergencyProfile.DoesNotExist:
             return Response({"detail": "No emergency profile found."}, status=status.HTTP_404_NOT_FOUND)
 
+from django.http import HttpResponse, Http404
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_safe
+from .qr import QR_CONTENT_TYPES, qr_data, render_qr, sign_qr_token
+
+
+def request_qr_data(request, token, signed):
+    # The ETag check and the view both need it; look the token up once per request
+    if not hasattr(request, '_qr_data'):
+        request._qr_data = qr_data(token, signed)
+    return request._qr_data
+
+
+def qr_image_etag(request, fmt, token=None, signed=None):
+    if fmt not in QR_CONTENT_TYPES:
+        return None
+    data = request_qr_data(request, token, signed)
+    if data is None:
+        return None
+    return render_qr(data, fmt)[1]
+
+
+# Rendered straight from the token; the image for a token never changes
+@require_safe
+@cache_control(public=True, max_age=31536000, immutable=True)
+@condition(etag_func=qr_image_etag)
+def qr_image_view(request, fmt, token=None, signed=None):
+    if fmt not in QR_CONTENT_TYPES:
+        raise Http404("Unknown QR code.")
+    data = request_qr_data(request, token, signed)
+    if data is None:
+        raise Http404("Unknown QR code.")
+    content, etag = render_qr(data, fmt)
+    return HttpResponse(content, content_type=QR_CONTENT_TYPES[fmt])
+
+
+from qrcode.exceptions import DataOverflowError
+from .offline_card import card_url, encode_card, public_key_b64
+
+
+# Static checker for offline cards; the card text travels in the URL fragment or is pasted in
+@require_safe
+@cache_control(public=True, max_age=86400)
+def offline_card_view(request):
+    return render(request, 'medvaultapp/offline_card.html', {"public_key": public_key_b64()})
+
+
+class OfflineCardQRView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, fmt):
+        if fmt not in QR_CONTENT_TYPES:
+            raise Http404("Unsupported QR format.")
+        try:
+            profile = request.user.emergencyprofile
+            token = profile.qrcode.qr_token
+        except (EmergencyProfile.DoesNotExist, QRCode.DoesNotExist):
+            return Response({"detail": "No emergency profile found."}, status=status.HTTP_404_NOT_FOUND)
+
+        # The card text itself, so it reads without the decoder page or a network
+        try:
+            content, etag = render_qr(encode_card(profile, token), fmt)
+        except (ValueError, DataOverflowError):
+            # Field values are capped to fit, so only an unusually long frontend URL gets here
+            return Response({"detail": "The emergency card is too long for a QR code."}, status=status.HTTP_400_BAD_REQUEST)
+        response = HttpResponse(content, content_type=QR_CONTENT_TYPES[fmt])
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from .pdf_cards import CARD_SIZES, get_card_pdf
+
+
+class EmergencyCardPDFView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        size = request.GET.get('size', 'wallet')
+        if size not in CARD_SIZES:
+            return Response({"detail": f"size must be one of {', '.join(CARD_SIZES)}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            profile = EmergencyProfile.objects.select_related('user', 'qrcode').get(user=request.user)
+        except EmergencyProfile.DoesNotExist:
+            return Response({"detail": "No emergency profile found."}, status=status.HTTP_404_NOT_FOUND)
+
+        pdf, digest = get_card_pdf(profile, size)
+        etag = f'"{digest}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponseNotModified(headers={"ETag": etag})
+        response = HttpResponse(pdf, content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="medvault_emergency_card_{size}.pdf"'
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
 # # 🎯 This endpoint is accessed via the QR link itself
 # class QRCodeStatusPublicView(APIView):
 #     permission_classes = [AllowAny]
@@ -198,7 +366,21 @@ from .models import QRCode
 class QRCodeStatusPublicView(APIView):
     permission_classes = [AllowAny]
 
-    def get(self, request, token):
+    def get(self, request, token=None, signed=None):
+        if signed is not None:
+            try:
+                live = get_live_qrcode(*unsign_qr_token(signed)) is not None
+            except signing.BadSignature:
+                live = False
+            if not live:
+                return Response({
+                    "detail": "QR code is inactive or expired."
+                }, status=status.HTTP_403_FORBIDDEN)
+            return Response({
+                "status": "active",
+                "message": "QR code is valid."
+            }, status=status.HTTP_200_OK)
+
         try:
             qrcode = get_object_or_404(QRCode, qr_token=token)
 
@@ -230,15 +412,16 @@ class ActivateQRCodeView(APIView):
             profile = request.user.emergencyprofile
             qrcode = profile.qrcode
             qrcode.activate()
-            return Response({"detail": "QR code activated for 1 hour."}, status=status.HTTP_200_OK)
+            return Response({
+                "detail": "QR code activated for 1 hour.",
+                **signed_qr_urls(request, qrcode),
+            }, status=status.HTTP_200_OK)
         except EmergencyProfile.DoesNotExist:
             return Response({"detail": "No emergency profile found."}, status=status.HTTP_404_NOT_FOUND)
 
 
 
 
-p = inflect.engine()  # For plural/singular conversion
-
 class FoodAllergyScanView(APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
@@ -246,77 +429,221 @@ class FoodAllergyScanView(APIView):
 
     def post(self, request):
         serializer = FoodAllergyScanSerializer(data=request.data)
-        if serializer.is_valid():
-            scan = serializer.save(user=request.user)
-
-            credentials = nyckel.Credentials(
-                "83qxpxmije8qtyh44rdjz7u7wxutzau3",
-                "9c7kedxfim5s366l87wpqb219j1s2ti9k4hhrxpquy0d214pq9krd4dx95avb4cp"
-            )
-
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+
+        upload = request.FILES.get('food_image')
+        if not upload and not serializer.validated_data.get('food_name') and not serializer.validated_data.get('food_image'):
+            return Response({"error": "Provide either food_name or food_image."}, status=400)
+        if not EmergencyProfile.objects.filter(user=request.user).exists():
+            return Response({"error": "Emergency profile not found."}, status=404)
+
+        # Text scans of well-known foods need no network, so answer them inline
+        if not upload and can_classify_locally(serializer.validated_data.get('food_name')):
+            scan = serializer.save(user=request.user, status="pending")
+            classify(scan)
+            scan.status = "done"
+            scan.save(update_fields=["food_name", "detected_allergen", "confidence", "risk_level", "status"])
+            return Response(FoodAllergyScanSerializer(scan).data, status=status.HTTP_201_CREATED)
+
+        image = None
+        if upload:
+            serializer.validated_data.pop('food_image', None)
             try:
-                # Determine food name
-                if scan.food_image:
-                    image_url = scan.food_image.url
-                    image_result = nyckel.invoke("meals-identifier", image_url, credentials)
-                    food_name = image_result["labelName"]
-                elif scan.food_name:
-                    food_name = scan.food_name
-                else:
-                    return Response({"error": "Provide either food_name or food_image."}, status=400)
-
-                # Get allergen from Nyckel
-                result = nyckel.invoke("food-allergens", food_name, credentials)
-                detected_allergen = result["labelName"].strip().lower()
-                confidence = result["confidence"]
-
-                # Normalize allergen to singular
-                singular_allergen = p.singular_noun(detected_allergen) or detected_allergen
-
-                # Get user's known allergies
-                try:
-                    profile = EmergencyProfile.objects.get(user=request.user)
-                    user_allergies = [a.strip().lower() for a in profile.allergies.split(",") if a.strip()]
-                    normalized_allergies = [p.singular_noun(a) or a for a in user_allergies]
-                except EmergencyProfile.DoesNotExist:
-                    return Response({"error": "Emergency profile not found."}, status=404)
-
-                # Match allergens
-                if singular_allergen in normalized_allergies:
-                    if confidence < 0.45:
-                        risk = "low"
-                    elif confidence > 0.45 and confidence < 0.7:
-                        risk = "medium"
-                    else:
-                        risk = "high"
-                else:
-                    risk = f"there are no allergy in {food_name}" 
-
-                # Save info
-                scan.food_name = food_name
-                scan.detected_allergen = detected_allergen
-                scan.confidence = confidence
-                scan.risk_level = risk
+                prepared = prepare_image(upload.name, upload.read())
+            except (UnidentifiedImageError, OSError):
+                return Response({"error": "food_image is not a readable image."}, status=400)
+            except Image.DecompressionBombError:
+                return Response({"error": "food_image has too many pixels."}, status=400)
+
+            # A near-duplicate of an earlier photo reuses that result and its stored image
+            duplicate = find_duplicate(prepared.phash, recent_hashed_scans(request.user.id))
+            if duplicate is not None:
+                scan = FoodAllergyScan(user=request.user, status="done", image_hash=prepared.phash)
+                reuse_result(scan, duplicate, load_allergies(request.user.id))
                 scan.save()
-
                 return Response(FoodAllergyScanSerializer(scan).data, status=status.HTTP_201_CREATED)
+            image = prepared.as_upload()
+
+        # The upload and classification happen in the background; the client polls the status URL
+        scan = serializer.save(user=request.user, status="pending", image_hash=prepared.phash if upload else None)
+        enqueue_scan(scan, image)
+
+        data = FoodAllergyScanSerializer(scan).data
+        data["status_url"] = request.build_absolute_uri(reverse('scan-food-status', args=[scan.id]))
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+class FoodAllergyScanBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+    max_items = 20
+
+    @extend_schema(
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "food_names": {"type": "array", "items": {"type": "string"}, "example": ["jollof rice", "suya"]},
+                    "food_images": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                },
+            },
+        }
+    )
+    def post(self, request):
+        if hasattr(request.data, 'getlist'):
+            food_names = request.data.getlist('food_names')
+        else:
+            food_names = request.data.get('food_names') or []
+        food_names = [name.strip() for name in food_names if isinstance(name, str) and name.strip()]
+        images = request.FILES.getlist('food_images')
+
+        # Counted before any file is read or decoded
+        if not food_names and not images:
+            return Response({"error": "Provide food_names and/or food_images."}, status=400)
+        if len(food_names) + len(images) > self.max_items:
+            return Response({"error": f"At most {self.max_items} items per batch."}, status=400)
+        if not EmergencyProfile.objects.filter(user=request.user).exists():
+            return Response({"error": "Emergency profile not found."}, status=404)
+
+        items = [(name, None) for name in food_names]
+        try:
+            items += [(None, prepare_image(f.name, f.read())) for f in images]
+        except (UnidentifiedImageError, OSError):
+            return Response({"error": "Every food_images entry must be a readable image."}, status=400)
+        except Image.DecompressionBombError:
+            return Response({"error": "Every food_images entry must be within the pixel limit."}, status=400)
+
+        outcomes = classify_batch(request.user, items)
+        results = []
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, Exception):
+                results.append({"index": index, "error": str(outcome)})
+            else:
+                results.append({"index": index, "scan": FoodAllergyScanSerializer(outcome).data})
+
+        created = any("scan" in r for r in results)
+        return Response({"results": results}, status=status.HTTP_201_CREATED if created else status.HTTP_502_BAD_GATEWAY)
+
+
+class AllergenUsersView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        allergen = request.GET.get('allergen', '').strip()
+        if not allergen:
+            return Response({"detail": "allergen is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        name = normalize_allergen(allergen)
+        users = User.objects.filter(emergencyprofile__allergy_index__name=name).values('id', 'username')
+        return Response({"allergen": name, "users": list(users[:1000])}, status=status.HTTP_200_OK)
+
+
+class PaystackClientStatsView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAdminUser]
 
-            except Exception as e:
-                scan.delete()
-                return Response({"error": str(e)}, status=500)
+    def get(self, request):
+        return Response(get_paystack_client().metrics.stats(), status=status.HTTP_200_OK)
+
+
+class ClassifierCacheStatsView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(classifier_cache.stats(), status=status.HTTP_200_OK)
 
-        return Response(serializer.errors, status=400)
 
+class FoodAllergyScanStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request, pk):
+        scan = get_object_or_404(FoodAllergyScan, pk=pk, user=request.user)
+        return Response(FoodAllergyScanSerializer(scan).data)
+
+
+
+class ScanSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        try:
+            top = min(max(int(request.GET.get('top', 5)), 1), 50)
+            days = min(max(int(request.GET.get('days', 30)), 1), getattr(settings, 'SCAN_SUMMARY_TREND_DAYS', 90))
+        except ValueError:
+            return Response({"detail": "top and days must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Maintained as scans finish, so this is a single row lookup
+        summary = ScanSummary.objects.filter(user=request.user).first() or ScanSummary(user=request.user)
+        serializer = ScanSummarySerializer(summary, context={"top": top, "days": days})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+from datetime import datetime
+from django.utils.dateparse import parse_date
+from .pagination import keyset_page
+
+
+def date_range_lookups(params):
+    """created_at lookups for the inclusive local dates in params['from'] and params['to'].
+
+    Compares created_at itself rather than created_at__date so indexes on it apply.
+    """
+    lookups = {}
+    for param, lookup, offset in (('from', 'created_at__gte', 0), ('to', 'created_at__lt', 1)):
+        value = params.get(param)
+        if not value:
+            continue
+        try:
+            day = parse_date(value)
+            if day is not None:
+                bound = timezone.make_aware(datetime.combine(day + timedelta(days=offset), datetime.min.time()))
+        except (ValueError, OverflowError):  # Not a real day (2024-02-30), or past date.max (9999-12-31 + 1)
+            day = None
+        if day is None:
+            raise ValueError(f"{param} must be a YYYY-MM-DD date.")
+        lookups[lookup] = bound
+    return lookups
 
 
 class FoodAllergyScanListView(APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
+    max_limit = 100
+
     def get(self, request):
         scans = FoodAllergyScan.objects.filter(user=request.user)
-        serializer = FoodAllergyScanSerializer(scans, many=True)
-        return Response(serializer.data)
+
+        risk_level = request.GET.get('risk_level', '').strip().lower()
+        if risk_level in ("low", "medium", "high"):
+            scans = scans.filter(risk_level=risk_level)
+        elif risk_level == "none":
+            scans = scans.exclude(risk_level__in=["low", "medium", "high"])
+        elif risk_level:
+            return Response({"detail": "risk_level must be low, medium, high or none."}, status=status.HTTP_400_BAD_REQUEST)
+
+        allergen = request.GET.get('detected_allergen', '').strip().lower()
+        if allergen:
+            scans = scans.filter(detected_allergen=allergen)
+
+        try:
+            scans = scans.filter(**date_range_lookups(request.GET))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(max(int(request.GET.get('limit', 20)), 1), self.max_limit)
+            page, next_cursor = keyset_page(scans, request.GET.get('cursor'), limit)
+        except ValueError:
+            return Response({"detail": "Invalid limit or cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = FoodAllergyScanSerializer(page, many=True)
+        return Response({"results": serializer.data, "next_cursor": next_cursor})
     
 
 
@@ -416,6 +743,41 @@ class TransactionListView(APIView):
     
 
 
+from . import ledger, limits
+
+
+from django.http import FileResponse
+from .statements import StatementTooLong, render_pdf, statement_transactions, stream_csv
+
+
+class WalletStatementView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request, fmt):
+        if fmt not in ('csv', 'pdf'):
+            raise Http404
+        # Wallet and owner in one query; the rows below never touch either
+        wallet = Wallet.objects.select_related('user').filter(user=request.user).first()
+        if not wallet:
+            return Response({"detail": "Wallet does not exist."}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            transactions = statement_transactions(wallet, **date_range_lookups(request.GET))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        filename = f"medvault_statement_{timezone.localdate().isoformat()}.{fmt}"
+        if fmt == 'csv':
+            response = StreamingHttpResponse(stream_csv(wallet, transactions), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+        try:
+            pdf = render_pdf(wallet, transactions)
+        except StatementTooLong as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return FileResponse(pdf, as_attachment=True, filename=filename, content_type='application/pdf')
+
+
 class WithdrawMoneyView(APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
@@ -465,20 +827,19 @@ class WithdrawMoneyView(APIView):
 
             if pin is None or pin != wallet.pin:
                 return Response({"detail": "Invalid PIN."}, status=status.HTTP_400_BAD_REQUEST)
-            if amount > wallet.user_balance:
+
+            # The balance and daily cap checks and the debit are one conditional UPDATE
+            try:
+                limits.check_withdrawal(wallet, amount)
+                withdrawal, entry = ledger.withdraw(wallet, amount, description=description)
+            except ledger.InsufficientFunds:
                 return Response({"detail": "Insufficient balance."}, status=status.HTTP_400_BAD_REQUEST)
+            except (limits.LimitExceeded, ValueError) as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            wallet.user_balance -= amount
-            wallet.save()
-            serializer.save(
-                wallet=wallet,
-                transaction_type='debit',
-                description = description
-        
-            )
             return Response({
-                "detail": f"You have successfully withdrawn {amount}. Your balance is {wallet.user_balance}. Your transfer is being processed.",
-                "transaction": serializer.data
+                "detail": f"You have successfully withdrawn {amount}. Your balance is {entry.balance_after}. Your transfer is being processed.",
+                "transaction": self.serializer_class(withdrawal).data
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -498,6 +859,7 @@ class GetUserBalance(APIView):
 
 
 
+
 class CreateTransactionView(APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
@@ -525,24 +887,17 @@ class CreateTransactionView(APIView):
         if not wallet:
             return Response({"detail": "Wallet does not exist."}, status=status.HTTP_404_NOT_FOUND)
 
-        # Check weekly deposit limit
-        last_deposit = Transaction.objects.filter(
-            wallet=wallet, 
-            transaction_type='credit',
-            status='success'  # Only count successful deposits
-        ).order_by('-created_at').first()
-        
-        if last_deposit and last_deposit.created_at > timezone.now() - timedelta(weeks=1):
-            return Response(
-                {"detail": "You can only deposit once a week. Please try again later."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
         serializer = self.serializer_class(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         amount = serializer.validated_data.get('amount', 0)
+
+        # Deposit frequency and size, from counters on the wallet row already loaded
+        try:
+            limits.check_deposit(wallet, amount)
+        except limits.LimitExceeded as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         pin = request.data.get('pin')
 
         # Validate PIN
@@ -587,30 +942,43 @@ class CreateTransactionView(APIView):
 
     def initialize_paystack_payment(self, email, amount, user, wallet):
         """Helper method to initialize Paystack payment"""
-        url = "https://api.paystack.co/transaction/initialize"
-        headers = {
-            "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "email": email,
-            "amount": int(amount * 100),  # Paystack uses kobo
-            "reference": f"DEP_{user.id}_{int(timezone.now().timestamp())}",
-            "callback_url": f"{settings.BASE_FRONTEND_URL}/verify-payment/",
-            "metadata": {
-                "wallet_id": str(wallet.id),
-                "user_id": str(user.id)
-            }
-        }
-
         try:
-            response = requests.post(url, headers=headers, json=payload)
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return get_paystack_client().initialize(
+                email=email,
+                amount=int(amount * 100),  # Paystack uses kobo
+                reference=f"DEP_{user.id}_{int(timezone.now().timestamp())}",
+                callback_url=f"{settings.BASE_FRONTEND_URL}/verify-payment/",
+                metadata={
+                    "wallet_id": str(wallet.id),
+                    "user_id": str(user.id)
+                },
+            )
+        except (requests.exceptions.RequestException, ValueError) as e:
             return {"status": False, "message": str(e)}
         
 
 
+import json
+from decimal import Decimal
+from django.views.decorators.http import require_POST
+from . import webhooks
+
+
+@csrf_exempt
+@require_POST
+def paystack_webhook(request):
+    # Paystack retries anything but a 200, so only forged or unreadable deliveries are refused
+    if not webhooks.valid_signature(request.body, request.headers.get('x-paystack-signature')):
+        return JsonResponse({"status": "failed", "message": "Invalid signature"}, status=400)
+    try:
+        event = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"status": "failed", "message": "Invalid JSON"}, status=400)
+
+    webhooks.handle_event(event)
+    return JsonResponse({"status": "success"})
+
+
 @csrf_exempt
 def verify_payment(request):
     # Handle both GET (Paystack callback) and POST (manual verification)
@@ -626,10 +994,7 @@ def verify_payment(request):
         
         try:
             # Verify with Paystack
-            url = f"https://api.paystack.co/transaction/verify/{reference}"
-            headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-            response = requests.get(url, headers=headers)
-            data = response.json()
+            data = get_paystack_client().verify(reference)
 
             if not data.get('status') or data['data']['status'] != 'success':
                 return JsonResponse(
@@ -637,19 +1002,33 @@ def verify_payment(request):
                     status=400
                 )
 
-            # Update transaction
-            transaction = Transaction.objects.get(
-                payment_reference=reference,
-                status='pending'
-            )
-            transaction.status = 'success'
-            transaction.save()
-            
-            # Update wallet balance
-            wallet = transaction.wallet
-            wallet.user_balance += transaction.amount
-            wallet.save()
-            
+            paid = kobo_to_amount(data['data'].get('amount'))
+            if paid is None:
+                logger.warning("Paystack verify for %s returned an invalid amount %r", reference, data['data'].get('amount'))
+                return JsonResponse(
+                    {"status": "failed", "message": "Invalid payment amount"},
+                    status=400
+                )
+
+            # Credits the wallet once; repeated callbacks for the same reference are no-ops
+            deposit, entry = ledger.settle_deposit(reference, amount=paid)
+            if entry is None and deposit.status == 'pending':
+                # Paid, but not what the deposit was for: hold it for review, as reconciliation does
+                logger.warning(
+                    "Deposit %s is for %s but Paystack reports %s paid; flagged for review",
+                    reference, deposit.amount, paid,
+                )
+                ledger.flag_for_review(deposit)
+                return JsonResponse(
+                    {"status": "failed", "message": "Paid amount does not match the deposit; it is held for review"},
+                    status=400
+                )
+            if entry is None and deposit.status != 'success':
+                return JsonResponse(
+                    {"status": "failed", "message": f"This deposit is {deposit.status}"},
+                    status=400
+                )
+
             return JsonResponse({"status": "success"})
             
         except Transaction.DoesNotExist:
@@ -657,6 +1036,11 @@ def verify_payment(request):
                 {"status": "failed", "message": "Transaction not found"},
                 status=404
             )
+        except (ValueError, ArithmeticError):
+            return JsonResponse(
+                {"status": "failed", "message": "Invalid payment amount"},
+                status=400
+            )
         except Exception as e:
             return JsonResponse(
                 {"status": "failed", "message": str(e)},
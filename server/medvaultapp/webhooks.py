@@ -0,0 +1,73 @@
+"""Paystack webhook handling.
+
+The webhook is authenticated by its HMAC alone, so crediting a deposit
+needs no call back to Paystack. Work is handed to a small thread pool and
+the request returns straight away; deposits a crashed worker never
+settled stay pending for the reconcile_deposits command to pick up.
+"""
+import hashlib
+import hmac
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import ledger
+from .models import Transaction
+from .paystack_client import kobo_to_amount
+
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'PAYSTACK_WEBHOOK_WORKERS', 2),
+    thread_name_prefix='paystack-webhook',
+)
+
+
+def valid_signature(body, signature):
+    """Check the x-paystack-signature header: hex HMAC-SHA512 of the raw body keyed with the secret key."""
+    if not signature:
+        return False
+    expected = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def credit_deposit(reference, amount):
+    close_old_connections()
+    try:
+        txn, entry = ledger.settle_deposit(reference, amount=amount)
+        if entry is None and txn.status == 'pending':
+            logger.warning("Paystack charge %s paid %s but the pending deposit is %s", reference, amount, txn.amount)
+        elif entry is None and txn.status != 'success':
+            logger.info("Paystack charge %s arrived for a deposit already marked %s", reference, txn.status)
+    except Transaction.DoesNotExist:
+        logger.warning("Paystack charge %s has no matching deposit", reference)
+    except Exception:
+        logger.exception("Crediting Paystack charge %s failed", reference)
+    finally:
+        close_old_connections()
+
+
+def handle_event(event):
+    """Queue the crediting work for `event`. Returns True if anything was queued."""
+    if not isinstance(event, dict) or event.get('event') != 'charge.success':
+        return False
+    data = event.get('data') or {}
+    reference = data.get('reference')
+    if not reference or data.get('status') != 'success':
+        return False
+
+    amount = kobo_to_amount(data.get('amount'))
+    if amount is None:
+        logger.warning("Paystack charge %s has an invalid amount %r", reference, data.get('amount'))
+        return False
+
+    # Deliveries for deposits that are already settled (or unknown) stop here
+    if not Transaction.objects.filter(payment_reference=reference, transaction_type='credit', status='pending').exists():
+        logger.info("Paystack charge %s has no pending deposit", reference)
+        return False
+
+    _executor.submit(credit_deposit, reference, amount)
+    return True